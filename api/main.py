@@ -6,17 +6,21 @@ This API serves as a bridge between the React frontend and LangGraph RAG service
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
-import sys
-from pathlib import Path
+from typing import Optional, Dict, Any, Iterator
+import json
 import uvicorn
 
-# Add parent directory to path for imports
-parent_dir = Path(__file__).parent.parent
-sys.path.insert(0, str(parent_dir))
+from langgraph_service.service.rag_service import RAGService
 
-from langgraph.service.rag_service import RAGService
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    # orjson is optional: it only speeds up encoding the streamed events
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -81,6 +85,7 @@ async def root():
         "status": "running",
         "endpoints": {
             "chat": "/chat",
+            "chat_stream": "/chat/stream",
             "status": "/status",
             "reset": "/chat/reset",
             "history": "/chat/history"
@@ -128,16 +133,13 @@ async def chat(request: ChatRequest):
         )
     
     try:
-        # Call the RAG service
-        result = rag_service.chat(
+        # Call the RAG service (awaited, so other requests are served meanwhile)
+        result = await rag_service.achat(
             query=request.message,
             reset_history=request.reset_history
         )
         
-        return ChatResponse(
-            response=result.get("response", ""),
-            metadata=result.get("metadata", {})
-        )
+        return ChatResponse(response=result)
     
     except Exception as e:
         raise HTTPException(
@@ -145,6 +147,34 @@ async def chat(request: ChatRequest):
             detail=f"Error processing chat request: {str(e)}"
         )
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Send a message and stream the response as server-sent events."""
+    if rag_service is None:
+        raise HTTPException(
+            status_code=503,
+            detail="RAG service is not available. Please check the service status."
+        )
+    
+    if not request.message.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="Message cannot be empty"
+        )
+    
+    def event_stream() -> Iterator[bytes]:
+        # Each chunk is one SSE event; a final "done" event closes the stream.
+        # Events are encoded straight to bytes, skipping an str round trip
+        for chunk in rag_service.stream_response(
+            query=request.message,
+            reset_history=request.reset_history
+        ):
+            yield b"data: " + _dumps({"delta": chunk}) + b"\n\n"
+        yield b"data: " + _dumps({"done": True}) + b"\n\n"
+    
+    # A sync generator runs in the threadpool, so the event loop is not blocked
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.post("/chat/reset")
 async def reset_conversation():
     """Reset the conversation history."""
@@ -2,16 +2,13 @@
 Simple FastAPI server without uvicorn auto-reload to avoid import issues.
 """
 
+import asyncio
+
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
-import sys
-from pathlib import Path
-
-# Add parent directory to path for imports
-parent_dir = Path(__file__).parent.parent
-sys.path.insert(0, str(parent_dir))
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -37,6 +34,12 @@ app.add_middleware(
 # Global RAG service instance
 rag_service: Optional[Any] = None
 
+# Maximum number of chat requests running the RAG pipeline at once
+MAX_CONCURRENT_CHATS = 5
+
+# Created on startup, in the event loop that serves the requests
+chat_semaphore: Optional[asyncio.Semaphore] = None
+
 # Pydantic models
 class ChatRequest(BaseModel):
     message: str
@@ -57,7 +60,7 @@ def init_rag_service():
     global rag_service
     try:
         # Try the simple RAG service first (more reliable)
-        from langgraph.service.simple_rag_service import SimpleRAGService
+        from langgraph_service.service.simple_rag_service import SimpleRAGService
         rag_service = SimpleRAGService()
         print("✅ Simple RAG service initialized successfully")
         return True
@@ -65,7 +68,7 @@ def init_rag_service():
         print(f"❌ Failed to initialize simple RAG service: {e}")
         try:
             # Fallback to full RAG service
-            from langgraph.service.rag_service import RAGService
+            from langgraph_service.service.rag_service import RAGService
             rag_service = RAGService()
             print("✅ Full RAG service initialized successfully")
             return True
@@ -78,6 +81,8 @@ def init_rag_service():
 @app.on_event("startup")
 async def startup_event():
     """Initialize the RAG service on application startup."""
+    global chat_semaphore
+    chat_semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHATS)
     init_rag_service()
 
 @app.get("/")
@@ -120,15 +125,16 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=400, detail="Message cannot be empty")
     
     try:
-        result = rag_service.chat(
-            query=request.message,
-            reset_history=request.reset_history
-        )
+        # Run the blocking pipeline in a worker thread so the event loop
+        # keeps serving other requests while this one waits on the LLM
+        async with chat_semaphore:
+            result = await run_in_threadpool(
+                rag_service.chat,
+                query=request.message,
+                reset_history=request.reset_history
+            )
         
-        return ChatResponse(
-            response=result.get("response", ""),
-            metadata=result.get("metadata", {})
-        )
+        return ChatResponse(response=result)
     
     except Exception as e:
         return ChatResponse(
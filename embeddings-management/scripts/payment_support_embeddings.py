@@ -11,6 +11,9 @@ from utils import json_to_embeddings, get_embedding_info
 # JSON file path (relative to project root)
 JSON_FILE_PATH = str(parent_dir / "mock-data" / "customer_support_data.json")
 
+# Number of entries written to ChromaDB per create() call
+CHROMA_BATCH = 200
+
 
 def main():
     """
@@ -44,12 +47,15 @@ def main():
     # Store embeddings in ChromaDB using service
     print("\n💾 Storing embeddings in ChromaDB...")
     db_service = ChromaDBService(collection_name="customer_support_embeddings")
-    created_ids = db_service.create(
-        texts=texts,
-        embeddings=embeddings,
-        ids=ids,
-        metadatas=metadatas
-    )
+    created_ids = []
+    for start in range(0, len(texts), CHROMA_BATCH):
+        end = start + CHROMA_BATCH
+        created_ids.extend(db_service.create(
+            texts=texts[start:end],
+            embeddings=embeddings[start:end],
+            ids=ids[start:end],
+            metadatas=metadatas[start:end]
+        ))
     
     print(f"✅ Successfully stored {len(created_ids)} embeddings in ChromaDB")
     
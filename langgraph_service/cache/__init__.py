@@ -0,0 +1,15 @@
+"""
+Cache module for LangGraph RAG service.
+
+This module provides the semantic response cache used by the graph and
+the SQLite store that persists it.
+"""
+
+from langgraph_service.cache.semantic_cache import SemanticCache, context_key
+from langgraph_service.cache.sqlite_store import SQLiteCacheStore
+
+__all__ = [
+    "SemanticCache",
+    "context_key",
+    "SQLiteCacheStore",
+]
@@ -0,0 +1,347 @@
+"""
+Semantic Response Cache for LangGraph RAG Service
+
+This module caches generated responses keyed by the embedding of the query,
+so a rephrased question that is close enough to one already answered can be
+served without retrieval or generation. Entries can optionally be persisted
+(in a SQLite file or a ChromaDB collection), so the cache survives a
+service restart.
+"""
+
+import threading
+import time
+from hashlib import blake2b
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from langgraph_service.config import (
+    SEMANTIC_CACHE_QUANTIZE,
+    SEMANTIC_CACHE_SIZE,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL,
+)
+
+# Element type of the in-memory embedding matrix for each SEMANTIC_CACHE_QUANTIZE
+# value. int8 rows are stored with a per-row scale (see _quantize)
+_MATRIX_DTYPES = {"none": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+def context_key(messages: Sequence[Dict[str, str]], system_prompt: Optional[str] = None) -> int:
+    """
+    Build the key of the conversation context a response was generated in.
+
+    Args:
+        messages: Conversation history sent to the LLM with the query
+        system_prompt: Optional custom system prompt
+
+    Returns:
+        64-bit digest of the history and system prompt, or 0 for a
+        standalone turn (no history, default system prompt)
+    """
+    if not messages and not system_prompt:
+        return 0
+    digest = blake2b((system_prompt or "").encode("utf-8"), digest_size=8)
+    for message in messages:
+        digest.update(f"\x00{message.get('role', '')}\x00{message.get('content', '')}".encode("utf-8"))
+    return int.from_bytes(digest.digest(), "big")
+
+
+class SemanticCache:
+    """
+    In-memory cache of query embeddings and their responses.
+
+    Embeddings are L2-normalized and stored as rows of a preallocated matrix,
+    so a lookup is a single matrix-vector product (inner product equals cosine
+    similarity). Entries expire after `ttl` seconds, and when the cache is full
+    the least recently used entry is replaced. The matrix can be stored as
+    float16 (half the memory) or int8 with a per-row scale (a quarter),
+    at the cost of about 0.001 / 0.01 in similarity precision. Only the
+    resident size shrinks: a lookup upcasts the matrix to a float32
+    temporary, which makes it slower than with a float32 matrix.
+
+    Each entry also records the context it was generated in (see
+    context_key), and only entries from the same context are served, so
+    a follow-up is never answered with a response meant for another
+    conversation. Standalone turns share context 0.
+
+    With a `store` (a SQLiteCacheStore, or a ChromaDBService for a dedicated
+    collection), every entry is also written to the store under an ID derived
+    from its embedding and context, and the live entries are loaded back when
+    the cache is created. Several processes can share one store: each only
+    replaces or deletes the entries it evicts itself. Lookups never touch the
+    store. Store errors are ignored: the cache then works in memory only.
+
+    The cache is thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_size: int = SEMANTIC_CACHE_SIZE,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl: float = SEMANTIC_CACHE_TTL,
+        store: Optional[Any] = None,
+        quantize: str = SEMANTIC_CACHE_QUANTIZE,
+    ):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            max_size: Maximum number of cached responses (0 disables the cache)
+            threshold: Minimum cosine similarity for a cache hit
+            ttl: Seconds before an entry expires (0 means entries never expire)
+            store: Optional SQLiteCacheStore or ChromaDBService used to
+                   persist the entries
+            quantize: Matrix element type: "none" (float32), "float16" or "int8"
+
+        Raises:
+            ValueError: If quantize is not one of the supported types
+        """
+        if quantize not in _MATRIX_DTYPES:
+            allowed = ", ".join(repr(name) for name in _MATRIX_DTYPES)
+            raise ValueError(f"quantize must be one of {allowed}, got {quantize!r}")
+
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl = ttl
+        self.store = store
+        self.quantize = quantize
+
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None  # Allocated on first put
+        self._dtype = _MATRIX_DTYPES[quantize]
+        self._scales = np.ones(max_size, dtype=np.float32)  # Used for int8 rows
+        self._responses: List[str] = []
+        self._ids: List[str] = []  # Store IDs, one per entry
+        self._contexts = np.zeros(max_size, dtype=np.uint64)
+        self._created = np.zeros(max_size, dtype=np.float64)
+        self._last_used = np.zeros(max_size, dtype=np.float64)
+
+        self.hits = 0
+        self.misses = 0
+
+        if store is not None:
+            self._load()
+
+    def lookup(self, embedding: Sequence[float], context: int = 0) -> Optional[str]:
+        """
+        Find a cached response for a query embedding.
+
+        Args:
+            embedding: Embedding vector of the query
+            context: Context key of the turn (0 for a standalone turn)
+
+        Returns:
+            The cached response, or None if no live entry is similar enough
+        """
+        query = self._normalize(embedding)
+
+        with self._lock:
+            size = len(self._responses)
+            if query is None or size == 0 or query.shape[0] != self._vectors.shape[1]:
+                self.misses += 1
+                return None
+
+            now = time.monotonic()
+            scores = self._vectors[:size] @ query
+            if self._dtype is np.int8:
+                scores *= self._scales[:size]
+            scores[self._contexts[:size] != np.uint64(context)] = -np.inf
+            if self.ttl > 0:
+                scores[now - self._created[:size] > self.ttl] = -np.inf
+
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self._last_used[best] = now
+            self.hits += 1
+            return self._responses[best]
+
+    def put(self, embedding: Sequence[float], response: str, context: int = 0) -> None:
+        """
+        Cache a response for a query embedding.
+
+        Args:
+            embedding: Embedding vector of the query
+            response: Response to return for similar queries
+            context: Context key of the turn (0 for a standalone turn)
+        """
+        vector = self._normalize(embedding)
+        if vector is None or self.max_size <= 0 or not response:
+            return
+
+        entry_id = self._entry_id(vector, context)
+
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                # First entry (or the embedding model changed): size the matrix
+                self._vectors = np.zeros((self.max_size, vector.shape[0]), dtype=self._dtype)
+                self._responses = []
+                self._ids = []
+
+            size = len(self._responses)
+            now = time.monotonic()
+            replaced_id = None
+
+            if entry_id in self._ids:
+                # Same query in the same context: update the entry in place
+                slot = self._ids.index(entry_id)
+                self._responses[slot] = response
+            elif size < self.max_size:
+                slot = size
+                self._responses.append(response)
+                self._ids.append(entry_id)
+            else:
+                # Replace the least recently used entry (expired entries are
+                # never used again, so they are picked first over time)
+                slot = int(np.argmin(self._last_used))
+                replaced_id = self._ids[slot]
+                self._responses[slot] = response
+                self._ids[slot] = entry_id
+
+            self._vectors[slot], self._scales[slot] = self._quantize(vector)
+            self._contexts[slot] = context
+            self._created[slot] = now
+            self._last_used[slot] = now
+
+            # Written under the lock, so writes to one slot reach the store in order
+            if self.store is not None:
+                self._persist(entry_id, replaced_id, vector, response, context)
+
+    def clear(self) -> None:
+        """Remove all cached responses and reset the statistics."""
+        with self._lock:
+            self._vectors = None
+            self._responses = []
+            self._ids = []
+            self._created[:] = 0.0
+            self._last_used[:] = 0.0
+            self.hits = 0
+            self.misses = 0
+
+        if self.store is not None:
+            try:
+                self.store.delete()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with size, hits, misses and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._responses),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _persist(
+        self,
+        entry_id: str,
+        replaced_id: Optional[str],
+        vector: np.ndarray,
+        response: str,
+        context: int
+    ) -> None:
+        """Write an entry to the store, deleting the entry it replaced (if any)."""
+        try:
+            # A ChromaDB collection does not overwrite existing IDs on create
+            self.store.delete(ids=[entry_id] if replaced_id is None else [replaced_id, entry_id])
+            self.store.create(
+                texts=[response],
+                embeddings=[vector.tolist()],
+                ids=[entry_id],
+                metadatas=[{"created_at": time.time(), "context": f"{context:016x}"}]
+            )
+        except Exception:
+            pass
+
+    def _load(self) -> None:
+        """Load the live entries persisted by previous runs (or other processes)."""
+        try:
+            stored = self.store.read()
+        except Exception:
+            return
+
+        embeddings = stored.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            return
+
+        # Wall-clock creation times become monotonic ones relative to now
+        wall_now = time.time()
+        now = time.monotonic()
+        entries = []
+        expired_ids = []
+        for entry_id, response, embedding, metadata in zip(
+            stored["ids"], stored["documents"], embeddings, stored["metadatas"]
+        ):
+            metadata = metadata or {}
+            age = wall_now - metadata.get("created_at", 0.0)
+            if (self.ttl > 0 and age > self.ttl) or not response:
+                expired_ids.append(entry_id)
+                continue
+            vector = self._normalize(embedding)
+            if vector is not None:
+                context = int(metadata.get("context", "0"), 16)
+                entries.append((age, entry_id, vector, response, context))
+
+        # Newest entries first, so the ones that fit are the most recent
+        # (the rest stay in the store for other processes)
+        entries.sort(key=lambda entry: entry[0])
+        if entries:
+            dimension = entries[0][2].shape[0]
+            entries = [entry for entry in entries if entry[2].shape[0] == dimension]
+            entries = entries[:self.max_size]
+
+            with self._lock:
+                self._vectors = np.zeros((self.max_size, dimension), dtype=self._dtype)
+                self._responses = [response for _, _, _, response, _ in entries]
+                self._ids = [entry_id for _, entry_id, _, _, _ in entries]
+                for slot, (age, _, vector, _, context) in enumerate(entries):
+                    self._vectors[slot], self._scales[slot] = self._quantize(vector)
+                    self._contexts[slot] = context
+                    self._created[slot] = now - age
+                    self._last_used[slot] = now - age
+
+        # Expired entries are never served again, by any process
+        if expired_ids:
+            try:
+                self.store.delete(ids=expired_ids)
+            except Exception:
+                pass
+
+    def _quantize(self, vector: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Convert a normalized vector to a matrix row and its scale.
+
+        int8 rows hold round(vector / scale), with scale = max(|vector|) / 127,
+        so row * scale restores the vector. Other types use a scale of 1.
+        """
+        if self._dtype is not np.int8:
+            return vector.astype(self._dtype), 1.0
+        scale = float(np.abs(vector).max()) / 127.0
+        return np.rint(vector / scale).astype(np.int8), scale
+
+    @staticmethod
+    def _entry_id(vector: np.ndarray, context: int) -> str:
+        """Derive the store ID of an entry from its normalized embedding and context."""
+        digest = blake2b(vector.tobytes(), digest_size=16)
+        digest.update(context.to_bytes(8, "big"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> Optional[np.ndarray]:
+        """L2-normalize an embedding, or return None if it is empty or zero."""
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector)) if vector.size else 0.0
+        if norm == 0.0:
+            return None
+        return vector / norm
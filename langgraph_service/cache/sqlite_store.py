@@ -0,0 +1,118 @@
+"""
+SQLite Store for the Semantic Response Cache
+
+This module persists semantic cache entries in a single SQLite file. It
+provides the subset of the ChromaDBService interface that SemanticCache
+uses (read, create, delete), so either can back the cache.
+"""
+
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class SQLiteCacheStore:
+    """
+    Stores cache entries (id, response, embedding, metadata) in SQLite.
+
+    The cache searches its in-memory matrix and only writes entries here
+    and reads them back at startup, so no vector index is needed: each
+    embedding is stored as a float32 blob. The store is thread-safe.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the store.
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "id TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "embedding BLOB NOT NULL, metadata TEXT)"
+            )
+
+    def read(self) -> Dict[str, Any]:
+        """
+        Read all entries.
+
+        Returns:
+            Dictionary with ids, documents, embeddings and metadatas lists,
+            in the same layout as ChromaDBService.read()
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, response, embedding, metadata FROM cache_entries"
+            ).fetchall()
+
+        return {
+            "ids": [row[0] for row in rows],
+            "documents": [row[1] for row in rows],
+            "embeddings": [np.frombuffer(row[2], dtype=np.float32) for row in rows],
+            "metadatas": [json.loads(row[3]) if row[3] else None for row in rows],
+        }
+
+    def create(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        ids: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ) -> List[str]:
+        """
+        Write entries, replacing any existing entries with the same IDs.
+
+        Args:
+            texts: Responses to store
+            embeddings: Query embeddings, one per response
+            ids: Entry IDs
+            metadatas: Optional metadata dictionaries, one per response
+
+        Returns:
+            List of IDs that were written
+        """
+        if metadatas is None:
+            metadatas = [None] * len(texts)
+
+        rows = [
+            (
+                entry_id,
+                text,
+                np.asarray(embedding, dtype=np.float32).tobytes(),
+                json.dumps(metadata) if metadata else None,
+            )
+            for entry_id, text, embedding, metadata in zip(ids, texts, embeddings, metadatas)
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?)", rows
+            )
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None) -> None:
+        """
+        Delete entries.
+
+        Args:
+            ids: IDs to delete. If None, deletes all entries.
+        """
+        with self._lock, self._connection:
+            if ids is None:
+                self._connection.execute("DELETE FROM cache_entries")
+            else:
+                self._connection.executemany(
+                    "DELETE FROM cache_entries WHERE id = ?", [(entry_id,) for entry_id in ids]
+                )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
@@ -2,29 +2,10 @@
 Configuration module for LangGraph RAG service.
 
 This module provides centralized configuration settings.
-"""
 
-from langgraph_service.config.settings import (
-    # Ollama Settings
-    OLLAMA_EMBED_API_URL,
-    OLLAMA_CHAT_API_URL,
-    EMBEDDING_MODEL,
-    CHAT_MODEL,
-    OLLAMA_TIMEOUT,
-    
-    # ChromaDB Settings
-    CHROMADB_PERSIST_DIRECTORY,
-    COLLECTION_NAME,
-    
-    # RAG Settings
-    RETRIEVAL_TOP_K,
-    SIMILARITY_THRESHOLD,
-    MAX_CONTEXT_LENGTH,
-    
-    # Conversation Settings
-    ENABLE_CONVERSATION_HISTORY,
-    MAX_HISTORY_LENGTH,
-)
+Settings are read from langgraph_service.config.settings on first access,
+so importing this package does not evaluate the settings module eagerly.
+"""
 
 __all__ = [
     "OLLAMA_EMBED_API_URL",
@@ -32,12 +13,40 @@ __all__ = [
     "EMBEDDING_MODEL",
     "CHAT_MODEL",
     "OLLAMA_TIMEOUT",
+    "LLM_BACKEND",
+    "VLLM_CHAT_API_URL",
+    "VLLM_MODEL",
     "CHROMADB_PERSIST_DIRECTORY",
     "COLLECTION_NAME",
     "RETRIEVAL_TOP_K",
     "SIMILARITY_THRESHOLD",
     "MAX_CONTEXT_LENGTH",
+    "MAX_CONTEXT_TOKENS",
     "ENABLE_CONVERSATION_HISTORY",
     "MAX_HISTORY_LENGTH",
+    "MAX_HISTORY_TOKENS",
+    "RESPONSE_CACHE_SIZE",
+    "RESPONSE_CACHE_TTL",
+    "EMBEDDING_CACHE_SIZE",
+    "ENABLE_SEMANTIC_CACHE",
+    "SEMANTIC_CACHE_THRESHOLD",
+    "SEMANTIC_CACHE_SIZE",
+    "SEMANTIC_CACHE_TTL",
+    "SEMANTIC_CACHE_QUANTIZE",
+    "SEMANTIC_CACHE_PERSIST",
+    "SEMANTIC_CACHE_STORE",
+    "SEMANTIC_CACHE_DB",
+    "SEMANTIC_CACHE_COLLECTION",
+    "ENABLE_SPECULATIVE_EXEC",
+    "SPECULATIVE_CONFIDENCE_THRESHOLD",
+    "ENABLE_WARMUP",
+    "OLLAMA_KEEP_ALIVE",
+    "WARMUP_REFRESH_INTERVAL",
 ]
 
+
+def __getattr__(name):
+    if name in __all__:
+        from langgraph_service.config import settings
+        return getattr(settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,30 +5,50 @@ All configuration constants are defined here for easy management.
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
+
+# Bound once: every setting below is a plain environ lookup
+_env = os.environ.get
 
 # ============================================================================
 # Ollama API Configuration
 # ============================================================================
 
 # Embeddings API (for generating embeddings)
-OLLAMA_EMBED_API_URL = os.getenv(
+OLLAMA_EMBED_API_URL = _env(
     "OLLAMA_EMBED_API_URL",
     "http://localhost:11434/api/embed"
 )
 
 # Chat API (for generating responses)
-OLLAMA_CHAT_API_URL = os.getenv(
+OLLAMA_CHAT_API_URL = _env(
     "OLLAMA_CHAT_API_URL",
     "http://localhost:11434/api/chat"
 )
 
 # Model names
-EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-minilm")
-CHAT_MODEL = os.getenv("CHAT_MODEL", "llama3")  # Changed from "llama3.2" to "llama3"
+EMBEDDING_MODEL = _env("EMBEDDING_MODEL", "all-minilm")
+CHAT_MODEL = _env("CHAT_MODEL", "llama3")  # Changed from "llama3.2" to "llama3"
 
 # Timeout settings (in seconds)
-OLLAMA_TIMEOUT = int(os.getenv("OLLAMA_TIMEOUT", "30"))
+OLLAMA_TIMEOUT = int(_env("OLLAMA_TIMEOUT", "30"))
+
+# ============================================================================
+# LLM Backend Configuration
+# ============================================================================
+
+# Chat backend: "ollama", or "vllm" for vLLM's OpenAI-compatible server,
+# which batches concurrent requests and scales better with many users
+LLM_BACKEND = _env("LLM_BACKEND", "ollama").lower()
+
+# vLLM chat completions API and the model name it serves
+VLLM_CHAT_API_URL = _env(
+    "VLLM_CHAT_API_URL",
+    "http://localhost:8000/v1/chat/completions"
+)
+VLLM_MODEL = _env("VLLM_MODEL", CHAT_MODEL)
 
 # ============================================================================
 # ChromaDB Configuration
@@ -36,13 +56,13 @@ OLLAMA_TIMEOUT = int(os.getenv("OLLAMA_TIMEOUT", "30"))
 
 # Persistence directory for ChromaDB
 # Default: ./chroma_db (relative to project root)
-CHROMADB_PERSIST_DIRECTORY = os.getenv(
+CHROMADB_PERSIST_DIRECTORY = _env(
     "CHROMADB_PERSIST_DIRECTORY",
     str(Path(__file__).parent.parent.parent / "chroma_db")
 )
 
 # Collection name for storing embeddings
-COLLECTION_NAME = os.getenv(
+COLLECTION_NAME = _env(
     "COLLECTION_NAME",
     "customer_support_embeddings"
 )
@@ -52,28 +72,112 @@ COLLECTION_NAME = os.getenv(
 # ============================================================================
 
 # Number of documents to retrieve from ChromaDB
-RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "3"))
+RETRIEVAL_TOP_K = int(_env("RETRIEVAL_TOP_K", "3"))
 
 # Minimum similarity score threshold (0.0 to 1.0)
 # Documents below this threshold will be filtered out
-SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.5"))
+SIMILARITY_THRESHOLD = float(_env("SIMILARITY_THRESHOLD", "0.5"))
 
 # Maximum context length (in characters)
 # Used to limit the size of context passed to LLM
-MAX_CONTEXT_LENGTH = int(os.getenv("MAX_CONTEXT_LENGTH", "2000"))
+MAX_CONTEXT_LENGTH = int(_env("MAX_CONTEXT_LENGTH", "2000"))
+
+# Maximum context length (in tokens)
+# Applied on top of MAX_CONTEXT_LENGTH when tiktoken is installed; 0 disables it
+MAX_CONTEXT_TOKENS = int(_env("MAX_CONTEXT_TOKENS", "1024"))
 
 # ============================================================================
 # Conversation Settings
 # ============================================================================
 
 # Enable conversation history
-ENABLE_CONVERSATION_HISTORY = os.getenv(
+ENABLE_CONVERSATION_HISTORY = _env(
     "ENABLE_CONVERSATION_HISTORY",
     "true"
 ).lower() == "true"
 
 # Maximum number of messages to keep in history
-MAX_HISTORY_LENGTH = int(os.getenv("MAX_HISTORY_LENGTH", "10"))
+MAX_HISTORY_LENGTH = int(_env("MAX_HISTORY_LENGTH", "10"))
+
+# Maximum history sent to the LLM (in tokens)
+# Oldest messages are dropped first when tiktoken is installed; 0 disables it
+MAX_HISTORY_TOKENS = int(_env("MAX_HISTORY_TOKENS", "1024"))
+
+# ============================================================================
+# Cache Settings
+# ============================================================================
+
+# Number of exact-match (query -> response) entries to keep in memory
+# Set to 0 to disable the response cache
+RESPONSE_CACHE_SIZE = int(_env("RESPONSE_CACHE_SIZE", "512"))
+
+# Seconds before a response cache entry expires, so answers do not outlive
+# knowledge base updates (0 = never)
+RESPONSE_CACHE_TTL = int(_env("RESPONSE_CACHE_TTL", "300"))
+
+# Number of query embeddings kept in memory, so a repeated query is not
+# embedded again; set to 0 to disable the embedding cache
+EMBEDDING_CACHE_SIZE = int(_env("EMBEDDING_CACHE_SIZE", "1024"))
+
+# Semantic cache: serve a cached response when a new query's embedding is
+# close enough to one already answered (skips retrieval and generation)
+ENABLE_SEMANTIC_CACHE = _env("ENABLE_SEMANTIC_CACHE", "true").lower() == "true"
+
+# Minimum cosine similarity (0.0 to 1.0) for a semantic cache hit
+SEMANTIC_CACHE_THRESHOLD = float(_env("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+
+# Number of responses kept in the semantic cache
+SEMANTIC_CACHE_SIZE = int(_env("SEMANTIC_CACHE_SIZE", "512"))
+
+# Seconds before a semantic cache entry expires (0 = never)
+SEMANTIC_CACHE_TTL = int(_env("SEMANTIC_CACHE_TTL", "300"))
+
+# Element type of the cached query embeddings kept in memory: "none"
+# (float32), "float16" (half the memory) or "int8" (a quarter). This only
+# shrinks resident memory: lookups upcast the matrix to float32, so they
+# get slower (float16 the most, as NumPy has no fast float16 product)
+SEMANTIC_CACHE_QUANTIZE = _env("SEMANTIC_CACHE_QUANTIZE", "none").lower()
+
+# Persist semantic cache entries, so cached responses survive a service restart
+SEMANTIC_CACHE_PERSIST = _env("SEMANTIC_CACHE_PERSIST", "true").lower() == "true"
+
+# Where entries are persisted: "sqlite" (a single file, SEMANTIC_CACHE_DB) or
+# "chroma" (a ChromaDB collection, SEMANTIC_CACHE_COLLECTION)
+SEMANTIC_CACHE_STORE = _env("SEMANTIC_CACHE_STORE", "sqlite").lower()
+SEMANTIC_CACHE_DB = _env(
+    "SEMANTIC_CACHE_DB",
+    str(Path(__file__).parent.parent.parent / "semantic_cache.db")
+)
+SEMANTIC_CACHE_COLLECTION = _env("SEMANTIC_CACHE_COLLECTION", "rag_semantic_cache")
+
+# ============================================================================
+# Speculative Execution
+# ============================================================================
+
+# Answer ambiguously classified queries down the RAG and direct paths at the
+# same time and keep the first answer. This doubles LLM load for those queries
+# (the losing generation runs to completion on Ollama), and their answers are
+# streamed as one chunk once the race is decided, not token by token
+ENABLE_SPECULATIVE_EXEC = _env("ENABLE_SPECULATIVE_EXEC", "false").lower() == "true"
+
+# Classification confidence below which a query counts as ambiguous
+SPECULATIVE_CONFIDENCE_THRESHOLD = float(_env("SPECULATIVE_CONFIDENCE_THRESHOLD", "0.7"))
+
+# ============================================================================
+# Startup Settings
+# ============================================================================
+
+# Warm up ChromaDB and the Ollama models in the background when a service
+# is created, so the first user query does not pay the cold-start cost
+ENABLE_WARMUP = _env("ENABLE_WARMUP", "true").lower() == "true"
+
+# How long Ollama should keep the chat model loaded after the warm-up call
+# and each chat request
+OLLAMA_KEEP_ALIVE = _env("OLLAMA_KEEP_ALIVE", "30m")
+
+# Seconds between repeated warm-up requests that keep the chat model loaded
+# while the service is idle (0 = warm up once at startup only)
+WARMUP_REFRESH_INTERVAL = int(_env("WARMUP_REFRESH_INTERVAL", "0"))
 
 # ============================================================================
 # Validation
@@ -86,42 +190,49 @@ def validate_settings():
     Raises:
         ValueError: If any setting has an invalid value.
     """
-    errors = []
-    
-    # Validate timeout
-    if OLLAMA_TIMEOUT <= 0:
-        errors.append("OLLAMA_TIMEOUT must be greater than 0")
+    # (failed, message) pairs, checked against the current values
+    checks = (
+        (OLLAMA_TIMEOUT <= 0, "OLLAMA_TIMEOUT must be greater than 0"),
+        (LLM_BACKEND not in ("ollama", "vllm"), "LLM_BACKEND must be 'ollama' or 'vllm'"),
+        (RETRIEVAL_TOP_K <= 0, "RETRIEVAL_TOP_K must be greater than 0"),
+        (not 0.0 <= SIMILARITY_THRESHOLD <= 1.0, "SIMILARITY_THRESHOLD must be between 0.0 and 1.0"),
+        (MAX_CONTEXT_LENGTH <= 0, "MAX_CONTEXT_LENGTH must be greater than 0"),
+        (MAX_CONTEXT_TOKENS < 0, "MAX_CONTEXT_TOKENS must be 0 or greater"),
+        (WARMUP_REFRESH_INTERVAL < 0, "WARMUP_REFRESH_INTERVAL must be 0 or greater"),
+        (MAX_HISTORY_LENGTH <= 0, "MAX_HISTORY_LENGTH must be greater than 0"),
+        (MAX_HISTORY_TOKENS < 0, "MAX_HISTORY_TOKENS must be 0 or greater"),
+        (RESPONSE_CACHE_SIZE < 0, "RESPONSE_CACHE_SIZE must be 0 or greater"),
+        (RESPONSE_CACHE_TTL < 0, "RESPONSE_CACHE_TTL must be 0 or greater"),
+        (not 0.0 <= SEMANTIC_CACHE_THRESHOLD <= 1.0, "SEMANTIC_CACHE_THRESHOLD must be between 0.0 and 1.0"),
+        (EMBEDDING_CACHE_SIZE < 0, "EMBEDDING_CACHE_SIZE must be 0 or greater"),
+        (SEMANTIC_CACHE_SIZE < 0, "SEMANTIC_CACHE_SIZE must be 0 or greater"),
+        (SEMANTIC_CACHE_TTL < 0, "SEMANTIC_CACHE_TTL must be 0 or greater"),
+        (SEMANTIC_CACHE_QUANTIZE not in ("none", "float16", "int8"), "SEMANTIC_CACHE_QUANTIZE must be 'none', 'float16' or 'int8'"),
+        (SEMANTIC_CACHE_STORE not in ("sqlite", "chroma"), "SEMANTIC_CACHE_STORE must be 'sqlite' or 'chroma'"),
+        (not 0.0 <= SPECULATIVE_CONFIDENCE_THRESHOLD <= 1.0, "SPECULATIVE_CONFIDENCE_THRESHOLD must be between 0.0 and 1.0"),
+    )
     
-    # Validate top_k
-    if RETRIEVAL_TOP_K <= 0:
-        errors.append("RETRIEVAL_TOP_K must be greater than 0")
-    
-    # Validate similarity threshold
-    if not 0.0 <= SIMILARITY_THRESHOLD <= 1.0:
-        errors.append("SIMILARITY_THRESHOLD must be between 0.0 and 1.0")
-    
-    # Validate max context length
-    if MAX_CONTEXT_LENGTH <= 0:
-        errors.append("MAX_CONTEXT_LENGTH must be greater than 0")
-    
-    # Validate max history length
-    if MAX_HISTORY_LENGTH <= 0:
-        errors.append("MAX_HISTORY_LENGTH must be greater than 0")
-    
-    if errors:
+    # Happy path: no error list is built when every check passes
+    if any(failed for failed, _ in checks):
+        errors = [message for failed, message in checks if failed]
         raise ValueError("Configuration validation failed:\n" + "\n".join(f"  - {e}" for e in errors))
     
     return True
 
 
+@lru_cache(maxsize=1)
 def get_settings_summary():
     """
     Get a summary of all configuration settings.
     
+    Settings are read from the environment once at import, so the summary
+    is built on the first call and the same read-only mapping is returned
+    afterwards.
+    
     Returns:
-        dict: Dictionary containing all settings.
+        Mapping: Read-only mapping of setting groups to their settings.
     """
-    return {
+    summary = {
         "ollama": {
             "embed_api_url": OLLAMA_EMBED_API_URL,
             "chat_api_url": OLLAMA_CHAT_API_URL,
@@ -129,6 +240,11 @@ def get_settings_summary():
             "chat_model": CHAT_MODEL,
             "timeout": OLLAMA_TIMEOUT,
         },
+        "llm": {
+            "backend": LLM_BACKEND,
+            "vllm_chat_api_url": VLLM_CHAT_API_URL,
+            "vllm_model": VLLM_MODEL,
+        },
         "chromadb": {
             "persist_directory": CHROMADB_PERSIST_DIRECTORY,
             "collection_name": COLLECTION_NAME,
@@ -137,10 +253,39 @@ def get_settings_summary():
             "retrieval_top_k": RETRIEVAL_TOP_K,
             "similarity_threshold": SIMILARITY_THRESHOLD,
             "max_context_length": MAX_CONTEXT_LENGTH,
+            "max_context_tokens": MAX_CONTEXT_TOKENS,
         },
         "conversation": {
             "enable_history": ENABLE_CONVERSATION_HISTORY,
             "max_history_length": MAX_HISTORY_LENGTH,
+            "max_history_tokens": MAX_HISTORY_TOKENS,
+        },
+        "cache": {
+            "response_cache_size": RESPONSE_CACHE_SIZE,
+            "response_cache_ttl": RESPONSE_CACHE_TTL,
+            "embedding_cache_size": EMBEDDING_CACHE_SIZE,
+            "enable_semantic_cache": ENABLE_SEMANTIC_CACHE,
+            "semantic_cache_threshold": SEMANTIC_CACHE_THRESHOLD,
+            "semantic_cache_size": SEMANTIC_CACHE_SIZE,
+            "semantic_cache_ttl": SEMANTIC_CACHE_TTL,
+            "semantic_cache_quantize": SEMANTIC_CACHE_QUANTIZE,
+            "semantic_cache_persist": SEMANTIC_CACHE_PERSIST,
+            "semantic_cache_store": SEMANTIC_CACHE_STORE,
+            "semantic_cache_db": SEMANTIC_CACHE_DB,
+            "semantic_cache_collection": SEMANTIC_CACHE_COLLECTION,
+        },
+        "speculative": {
+            "enable_speculative_exec": ENABLE_SPECULATIVE_EXEC,
+            "confidence_threshold": SPECULATIVE_CONFIDENCE_THRESHOLD,
+        },
+        "startup": {
+            "enable_warmup": ENABLE_WARMUP,
+            "ollama_keep_alive": OLLAMA_KEEP_ALIVE,
+            "warmup_refresh_interval": WARMUP_REFRESH_INTERVAL,
         },
     }
-
+    
+    # Read-only views, so callers cannot mutate the cached summary
+    return MappingProxyType({
+        group: MappingProxyType(values) for group, values in summary.items()
+    })
@@ -13,11 +13,13 @@ from langgraph_service.graph.state import (
     state_to_dict,
 )
 from langgraph_service.graph.nodes import (
+    semantic_cache_node,
     classify_query_node,
     retrieve_node,
     format_context_node,
     generate_node,
     direct_answer_node,
+    speculative_answer_node,
     respond_node,
 )
 
@@ -32,11 +34,13 @@ __all__ = [
     "create_initial_state",
     "create_state_from_dict",
     "state_to_dict",
+    "semantic_cache_node",
     "classify_query_node",
     "retrieve_node",
     "format_context_node",
     "generate_node",
     "direct_answer_node",
+    "speculative_answer_node",
     "respond_node",
 ]
 
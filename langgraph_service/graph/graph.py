@@ -5,297 +5,298 @@ This module creates and compiles the LangGraph with all nodes, edges,
 and conditional routing logic.
 """
 
-from typing import Literal, Any
+from __future__ import annotations
+
+import site
+from functools import lru_cache
+from typing import Literal, Any, List, Union
 
 # Import local modules first (to avoid circular import)
+from langgraph_service.shared import shared_instance
 from langgraph_service.graph.state import GraphState
 from langgraph_service.graph.nodes import (
+    semantic_cache_node,
     classify_query_node,
     retrieve_node,
     format_context_node,
     generate_node,
     direct_answer_node,
+    speculative_answer_node,
     respond_node,
 )
+from langgraph_service.config import (
+    ENABLE_SPECULATIVE_EXEC,
+    SPECULATIVE_CONFIDENCE_THRESHOLD,
+)
+
+# Site-packages directories, resolved once at import
+_SITE_PACKAGES = tuple(site.getsitepackages()) + (
+    (site.getusersitepackages(),) if site.ENABLE_USER_SITE else ()
+)
+
+
+def _find_installed_langgraph():
+    """
+    Import langgraph.graph from the installed library.
+    
+    The current working directory and its parents are temporarily removed
+    from sys.path, so a local 'langgraph' directory cannot shadow the
+    installed package. The caller is responsible for evicting any local
+    langgraph modules from sys.modules first.
+    
+    Returns:
+        The installed langgraph.graph module, or None if it is not found
+    """
+    import os
+    import sys
+    import importlib
+    import importlib.util
+    from pathlib import Path
+    
+    cwd = os.getcwd()
+    local_paths = {cwd, *(str(parent) for parent in Path(cwd).parents)}
+    original_path = sys.path[:]
+    
+    try:
+        # An empty entry on sys.path also means the current directory
+        sys.path[:] = [p for p in sys.path if (p or cwd) not in local_paths]
+        
+        # One spec lookup tells us where langgraph.graph would be loaded from
+        # (langgraph itself is a namespace package without an origin)
+        spec = importlib.util.find_spec('langgraph.graph')
+        origin = spec.origin if spec else None
+        if not origin or ('site-packages' not in origin and 'dist-packages' not in origin):
+            return None
+        
+        return importlib.import_module('langgraph.graph')
+    except ImportError:
+        return None
+    finally:
+        # Always restore path
+        sys.path[:] = original_path
+
+
+def _diagnose_langgraph_install():
+    """
+    Check whether the langgraph distribution is installed.
+    
+    Only called after the import has failed, so the slow pkg_resources
+    fallback never runs on the success path.
+    
+    Returns:
+        Tuple of (installed, version); version is None if unknown
+    """
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        # importlib.metadata not available (Python < 3.8), try pkg_resources
+        try:
+            import pkg_resources  # type: ignore
+            return True, pkg_resources.get_distribution('langgraph').version
+        except Exception:
+            return False, None
+    
+    try:
+        return True, version('langgraph')
+    except PackageNotFoundError:
+        return False, None
+
 
 # Lazy import StateGraph to avoid circular dependency
 # Import it inside functions when needed
+@lru_cache(maxsize=1)
 def _get_state_graph():
-    """Lazy import StateGraph from LangGraph library."""
+    """
+    Lazy import StateGraph from LangGraph library.
+    
+    The resolved class is cached, so the import discovery below runs at most
+    once per process (failures are not cached and will be retried).
+    """
     try:
+        import os
         import sys
-        import importlib
         import importlib.util
-        from pathlib import Path
+        
+        # Fast path: the installed library is already imported, so a single
+        # sys.modules lookup is enough. The installed langgraph is a namespace
+        # package without __file__, so check its regular langgraph.graph
+        # subpackage instead.
+        graph_module = sys.modules.get('langgraph.graph')
+        graph_file = getattr(graph_module, '__file__', None) or ''
+        if 'site-packages' in graph_file or 'dist-packages' in graph_file:
+            return graph_module.StateGraph
         
         # Strategy: Find and import the installed langgraph package
         # We need to bypass our local langgraph module
         
-        # Save references to our local modules
-        modules_to_restore = {}
-        for mod_name in list(sys.modules.keys()):
-            if mod_name.startswith('langgraph'):
-                modules_to_restore[mod_name] = sys.modules[mod_name]
+        # Save references to our local modules. Match the 'langgraph' package
+        # and its submodules only, so langgraph_service.* stays loaded.
+        modules_to_restore = {
+            mod_name: module
+            for mod_name, module in list(sys.modules.items())
+            if mod_name == 'langgraph' or mod_name.startswith('langgraph.')
+        }
         
         # Remove from cache
         for mod_name in modules_to_restore:
             del sys.modules[mod_name]
         
         try:
-            # First, check if we can detect the conflict
-            import importlib.util
+            # Import the installed library with local paths out of the way
+            graph_module = _find_installed_langgraph()
+            if graph_module is not None and hasattr(graph_module, 'StateGraph'):
+                return graph_module.StateGraph
+            
+            # The installed package could not be imported; work out why
+            installed, langgraph_version = _diagnose_langgraph_install()
+            if not installed:
+                raise ImportError(
+                    "langgraph package is not installed. "
+                    "Install it with: pip install langgraph"
+                )
+            
+            # Check if we can detect the conflict
             spec = importlib.util.find_spec('langgraph')
             if spec and spec.origin:
-                spec_path = Path(spec.origin).resolve()
+                # Plain string checks on the normalized path (no resolve() syscalls)
+                spec_path = os.path.normcase(os.path.normpath(spec.origin))
                 # Check if it's our local module (not in site-packages)
-                is_local = 'site-packages' not in str(spec_path) and 'dist-packages' not in str(spec_path)
+                is_local = 'site-packages' not in spec_path and 'dist-packages' not in spec_path
                 if is_local:
                     # We have a conflict - our local langgraph is being found first
                     # Try to work around it by using the known installed package path
-                    import site
-                    site_packages = site.getsitepackages()
-                    for sp_path in site_packages:
-                        installed_graph_path = Path(sp_path) / 'langgraph' / 'graph' / '__init__.py'
-                        if installed_graph_path.exists():
+                    for sp_path in _SITE_PACKAGES:
+                        installed_graph_path = os.path.join(sp_path, 'langgraph', 'graph', '__init__.py')
+                        if os.path.exists(installed_graph_path):
                             # We found the installed package, but can't import it normally
                             # This is a known limitation - provide helpful error
-                            try:
-                                import importlib.metadata
-                                version = importlib.metadata.version('langgraph')
-                            except:
-                                version = "installed"
-                            
                             raise ImportError(
                                 f"PACKAGE NAME CONFLICT DETECTED\n\n"
                                 f"The local 'langgraph' package in this project conflicts with the installed "
-                                f"langgraph library (version {version}).\n\n"
+                                f"langgraph library (version {langgraph_version or 'installed'}).\n\n"
                                 f"SOLUTION: Rename the local 'langgraph' directory:\n"
                                 f"  mv langgraph langgraph_service\n\n"
                                 f"Then update all imports from 'langgraph' to 'langgraph_service' in your code.\n"
                                 f"Alternatively, use a virtual environment and install langgraph there."
                             )
             
-            # Find the installed langgraph package in site-packages
-            import site
-            site_packages = site.getsitepackages()
-            
-            # Also check user site-packages
-            try:
-                user_site = site.getusersitepackages()
-                if user_site:
-                    site_packages.append(user_site)
-            except:
-                pass
-            
-            StateGraph = None
-            found_package = False
-            
-            # Look for langgraph in site-packages
-            for sp_path in site_packages:
-                langgraph_path = Path(sp_path) / 'langgraph'
-                graph_init_path = langgraph_path / 'graph' / '__init__.py'
-                
-                if not graph_init_path.exists():
-                    continue
-                
-                # Found installed package! Try to load StateGraph
-                try:
-                    # Method 1: Load module directly from file
-                    spec = importlib.util.spec_from_file_location(
-                        'langgraph_lib_graph',
-                        graph_init_path
-                    )
-                    if spec and spec.loader:
-                        # We need to set up the parent package structure
-                        # First, create a minimal langgraph package
-                        if 'langgraph_lib' not in sys.modules:
-                            langgraph_lib_pkg = importlib.util.module_from_spec(
-                                importlib.util.spec_from_file_location(
-                                    'langgraph_lib',
-                                    langgraph_path / '__init__.py'
-                                )
-                            )
-                            sys.modules['langgraph_lib'] = langgraph_lib_pkg
-                        
-                        graph_module = importlib.util.module_from_spec(spec)
-                        graph_module.__package__ = 'langgraph.graph'
-                        graph_module.__name__ = 'langgraph.graph'
-                        spec.loader.exec_module(graph_module)
-                        
-                        if hasattr(graph_module, 'StateGraph'):
-                            StateGraph = graph_module.StateGraph
-                            found_package = True
-                            break
-                except Exception:
-                    pass
-                
-                # Method 2: Import by manipulating sys.path and using importlib machinery
-                try:
-                    # Save current state
-                    original_path = sys.path[:]
-                    original_cwd = Path.cwd()
-                    cwd_str = str(original_cwd)
-                    
-                    # Create a clean environment for importing
-                    # Remove current directory and any parent directories from path
-                    paths_to_remove = [cwd_str]
-                    for parent in original_cwd.parents:
-                        parent_str = str(parent)
-                        if parent_str in sys.path:
-                            paths_to_remove.append(parent_str)
-                    
-                    for path_to_remove in paths_to_remove:
-                        if path_to_remove in sys.path:
-                            sys.path.remove(path_to_remove)
-                    
-                    # Add site-packages first (before any remaining paths)
-                    if str(sp_path) not in sys.path:
-                        sys.path.insert(0, str(sp_path))
-                    
-                    # Clear ALL langgraph modules from cache (including submodules)
-                    modules_to_clear = [m for m in list(sys.modules.keys()) if m.startswith('langgraph')]
-                    for mod in modules_to_clear:
-                        del sys.modules[mod]
-                    
-                    # Now import - should get installed package since current dir is removed
-                    langgraph_pkg = importlib.import_module('langgraph')
-                    
-                    # Verify it's the installed package by checking __file__
-                    pkg_file = getattr(langgraph_pkg, '__file__', None)
-                    if pkg_file:
-                        pkg_file_str = str(Path(pkg_file).resolve())
-                        sp_path_str = str(Path(sp_path).resolve())
-                        if sp_path_str not in pkg_file_str:
-                            # This is not from the site-packages we're checking, try next
-                            continue
-                    
-                    # Get StateGraph from langgraph_service.graph
-                    if hasattr(langgraph_pkg, 'graph'):
-                        graph_submodule = langgraph_pkg.graph
-                        if hasattr(graph_submodule, 'StateGraph'):
-                            StateGraph = graph_submodule.StateGraph
-                            found_package = True
-                            break
-                except Exception as e:
-                    # Debug: uncomment to see what's happening
-                    # print(f"Import attempt failed: {e}")
-                    pass
-                finally:
-                    # Always restore path
-                    sys.path[:] = original_path
-                
-                if found_package:
-                    break
-            
-            if not found_package or StateGraph is None:
-                # Last resort: Try using importlib.machinery to load directly
-                try:
-                    import importlib.machinery
-                    for sp_path in site_packages:
-                        graph_init_path = Path(sp_path) / 'langgraph' / 'graph' / '__init__.py'
-                        if graph_init_path.exists():
-                            # Use SourceFileLoader to load the module
-                            loader = importlib.machinery.SourceFileLoader(
-                                'langgraph_installed_graph',
-                                str(graph_init_path)
-                            )
-                            # Create a minimal parent package structure
-                            if 'langgraph_installed' not in sys.modules:
-                                langgraph_init_path = Path(sp_path) / 'langgraph' / '__init__.py'
-                                if langgraph_init_path.exists():
-                                    parent_loader = importlib.machinery.SourceFileLoader(
-                                        'langgraph_installed',
-                                        str(langgraph_init_path)
-                                    )
-                                    parent_module = parent_loader.load_module('langgraph_installed')
-                                    sys.modules['langgraph_installed'] = parent_module
-                            
-                            graph_module = loader.load_module('langgraph_installed_graph')
-                            if hasattr(graph_module, 'StateGraph'):
-                                StateGraph = graph_module.StateGraph
-                                found_package = True
-                                break
-                except Exception:
-                    pass
-                
-                if not found_package or StateGraph is None:
-                    # Check if langgraph is installed at all
-                    try:
-                        import importlib.metadata
-                        try:
-                            langgraph_version = importlib.metadata.version('langgraph')
-                            # Package is installed, but we can't import it due to local module conflict
-                            raise ImportError(
-                                f"langgraph package is installed (version {langgraph_version}), but cannot be imported "
-                                "due to a conflict with the local 'langgraph' package in this project.\n\n"
-                                "SOLUTION: Rename the local 'langgraph' directory to avoid the conflict.\n"
-                                "For example: mv langgraph langgraph_service\n\n"
-                                "Then update imports in your code to use 'langgraph_service' instead of 'langgraph'."
-                            )
-                        except importlib.metadata.PackageNotFoundError:
-                            # Package is not installed
-                            raise ImportError(
-                                "langgraph package is not installed. "
-                                "Install it with: pip install langgraph"
-                            )
-                    except ImportError as e:
-                        # Re-raise if it's our custom error
-                        if "SOLUTION" in str(e):
-                            raise
-                        # importlib.metadata not available (Python < 3.8), try pkg_resources
-                        try:
-                            import pkg_resources  # type: ignore
-                            pkg_resources.get_distribution('langgraph')
-                            # Package is installed but can't import due to conflict
-                            raise ImportError(
-                                "langgraph package is installed, but cannot be imported "
-                                "due to a conflict with the local 'langgraph' package.\n\n"
-                                "SOLUTION: Rename the local 'langgraph' directory (e.g., to 'langgraph_service')."
-                            )
-                        except (pkg_resources.DistributionNotFound, ImportError):
-                            # Package not installed
-                            raise ImportError(
-                                "langgraph package is not installed. "
-                                "Install it with: pip install langgraph"
-                            )
-            
-            return StateGraph
+            # Package is installed, but we can't import it due to local module conflict
+            raise ImportError(
+                f"langgraph package is installed (version {langgraph_version or 'unknown'}), but cannot be imported "
+                "due to a conflict with the local 'langgraph' package in this project.\n\n"
+                "SOLUTION: Rename the local 'langgraph' directory to avoid the conflict.\n"
+                "For example: mv langgraph langgraph_service\n\n"
+                "Then update imports in your code to use 'langgraph_service' instead of 'langgraph'."
+            )
             
         finally:
             # Restore our local modules
             for mod_name, module in modules_to_restore.items():
                 sys.modules[mod_name] = module
                 
-    except (ImportError, AttributeError) as e:
+    except AttributeError as e:
+        # The ImportErrors raised above already explain the fix; only wrap a
+        # langgraph.graph module that turned out not to provide StateGraph
         raise ImportError(
             f"Could not import StateGraph from langgraph library: {e}. "
             "Make sure langgraph is installed: pip install langgraph"
         ) from e
 
 
-def route_after_classification(state: GraphState) -> Literal["rag_path", "direct_path", "respond"]:
+# Route taken after classification for each query type
+_ROUTE_MAP = {
+    "rag_required": "rag_path",
+    "direct_answer": "direct_path",
+    "greeting": "direct_path",
+}
+
+# Query types whose path is worth racing when classification is unsure
+_SPECULATIVE_TYPES = ("rag_required", "direct_answer")
+
+
+# Nodes run in parallel on a cache miss: retrieval overlaps classification
+_MISS_PATH = ["classify", "retrieve"]
+
+
+def route_after_cache(state: GraphState) -> Union[Literal["respond"], List[str]]:
+    """
+    Route decision function after the semantic cache lookup.
+    
+    - cache hit → respond (the cached response is already in the state)
+    - cache miss → classify and retrieve, run in parallel
+    
+    Args:
+        state: Current graph state
+        
+    Returns:
+        "respond", or the list of nodes to run next
+    """
+    metadata = state.get("metadata")
+    return "respond" if metadata and metadata.get("semantic_cache_hit") else _MISS_PATH
+
+
+def route_after_classification(
+    state: GraphState,
+) -> Literal["rag_path", "direct_path", "speculative_path", "respond"]:
     """
     Route decision function after classification.
     
     Determines which path to take based on the query type:
-    - rag_required → rag_path (retrieve → format → generate)
+    - rag_required → rag_path (format → generate, using the documents
+      retrieved alongside classification)
     - direct_answer or greeting → direct_path (direct answer)
     - unclear → respond (skip to response)
     
+    With ENABLE_SPECULATIVE_EXEC, a rag_required or direct_answer query
+    classified below SPECULATIVE_CONFIDENCE_THRESHOLD goes to
+    speculative_path (both answers at once).
+    
     Args:
         state: Current graph state
         
     Returns:
         Literal string indicating which path to take
     """
-    query_type = state.get("metadata", {}).get("query_type", "unclear")
+    metadata = state.get("metadata")
+    query_type = metadata.get("query_type") if metadata else None
     
-    if query_type == "rag_required":
-        return "rag_path"
-    elif query_type in ["direct_answer", "greeting"]:
-        return "direct_path"
-    else:  # unclear
-        return "respond"
+    if (
+        ENABLE_SPECULATIVE_EXEC
+        and query_type in _SPECULATIVE_TYPES
+        and metadata.get("classification_confidence", 1.0) < SPECULATIVE_CONFIDENCE_THRESHOLD
+    ):
+        return "speculative_path"
+    
+    # Unclear or missing query types skip straight to the response
+    return _ROUTE_MAP.get(query_type, "respond")
+
+
+# Graph nodes, registered in this order. The node functions are registered
+# directly; their clients (classifier, retriever, LLM) come from the shared
+# getters in nodes.py, so a graph run does not rebuild them per query.
+_NODES = (
+    ("semantic_cache", semantic_cache_node),
+    ("classify", classify_query_node),
+    ("retrieve", retrieve_node),
+    ("format_context", format_context_node),
+    ("generate", generate_node),
+    ("direct_answer", direct_answer_node),
+    ("speculative_answer", speculative_answer_node),
+    ("respond", respond_node),
+)
+
+# Fixed edges (the branch after classify is a conditional edge). retrieve has
+# no outgoing edge: it runs alongside classify, and format_context reads its
+# documents from the state on the RAG path.
+_EDGES = (
+    # RAG path: format_context → generate → respond
+    ("format_context", "generate"),
+    ("generate", "respond"),
+    # Direct path: direct_answer → respond
+    ("direct_answer", "respond"),
+    # Speculative path: speculative_answer → respond
+    ("speculative_answer", "respond"),
+)
 
 
 def create_graph() -> Any:  # Using Any to avoid type issues with lazy import
@@ -318,34 +319,39 @@ def create_graph() -> Any:  # Using Any to avoid type issues with lazy import
     graph = StateGraph(GraphState)
     
     # Add all nodes
-    graph.add_node("classify", classify_query_node)
-    graph.add_node("retrieve", retrieve_node)
-    graph.add_node("format_context", format_context_node)
-    graph.add_node("generate", generate_node)
-    graph.add_node("direct_answer", direct_answer_node)
-    graph.add_node("respond", respond_node)
+    for name, node in _NODES:
+        graph.add_node(name, node)
     
     # Set entry point
-    graph.set_entry_point("classify")
+    graph.set_entry_point("semantic_cache")
+    
+    # Cache hits skip classification, retrieval and generation; misses
+    # fan out to classify and retrieve in the same step
+    graph.add_conditional_edges(
+        "semantic_cache",
+        route_after_cache,
+        {
+            "respond": "respond",
+            "classify": "classify",
+            "retrieve": "retrieve"
+        }
+    )
     
     # Add conditional routing after classification
     graph.add_conditional_edges(
         "classify",
         route_after_classification,
         {
-            "rag_path": "retrieve",
+            "rag_path": "format_context",
             "direct_path": "direct_answer",
+            "speculative_path": "speculative_answer",
             "respond": "respond"
         }
     )
     
-    # RAG path: retrieve → format_context → generate → respond
-    graph.add_edge("retrieve", "format_context")
-    graph.add_edge("format_context", "generate")
-    graph.add_edge("generate", "respond")
-    
-    # Direct path: direct_answer → respond
-    graph.add_edge("direct_answer", "respond")
+    # Fixed edges for the RAG and direct paths
+    for source, target in _EDGES:
+        graph.add_edge(source, target)
     
     # Respond is the final node (end)
     graph.set_finish_point("respond")
@@ -353,10 +359,14 @@ def create_graph() -> Any:  # Using Any to avoid type issues with lazy import
     return graph
 
 
+@shared_instance
 def compile_graph() -> Any:  # Using Any to avoid type issues with lazy import
     """
     Create and compile the LangGraph.
     
+    The compiled graph holds no per-run state (each invoke/stream gets its
+    own GraphState), so one instance is built and shared by all callers.
+    
     Returns:
         Compiled StateGraph ready to use
     """
@@ -365,18 +375,38 @@ def compile_graph() -> Any:  # Using Any to avoid type issues with lazy import
     return compiled
 
 
-# Create a compiled graph instance
-# This can be imported and used directly
-try:
-    app = compile_graph()
-except Exception as e:
-    # If compilation fails (e.g., LangGraph not installed), set to None
-    app = None
-    import warnings
-    warnings.warn(
-        f"Failed to compile LangGraph: {e}. "
-        "Make sure langgraph is installed: pip install langgraph"
-    )
+# Compiled graph instance, built on first access to `app` (see __getattr__)
+# so importing this module does not compile the graph
+_app = None
+
+# Error from the first failed compile, kept so later calls fail fast
+_APP_ERROR = None
+
+
+def _load_app() -> Any:
+    """
+    Compile the graph on first use and keep the instance.
+    
+    A failed compile is recorded in _APP_ERROR and not retried.
+    
+    Returns:
+        Compiled StateGraph, or None if compilation failed
+    """
+    global _app, _APP_ERROR
+    if _app is None and _APP_ERROR is None:
+        try:
+            _app = compile_graph()
+        except Exception as e:
+            # If compilation fails (e.g., LangGraph not installed), leave it as None
+            _APP_ERROR = e
+    return _app
+
+
+def __getattr__(name: str) -> Any:
+    """Build the module-level `app` lazily on first attribute access."""
+    if name == "app":
+        return _load_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class RAGGraph:
@@ -387,8 +417,8 @@ class RAGGraph:
     """
     
     def __init__(self):
-        """Initialize the RAG graph."""
-        self.graph = compile_graph()
+        """Initialize the RAG graph (reuses the shared compiled graph)."""
+        self.graph = get_graph()
     
     def invoke(self, state: GraphState) -> GraphState:
         """
@@ -402,18 +432,37 @@ class RAGGraph:
         """
         return self.graph.invoke(state)
     
-    def stream(self, state: GraphState):
+    async def ainvoke(self, state: GraphState) -> GraphState:
+        """
+        Invoke the graph with initial state, asynchronously.
+        
+        The synchronous nodes run in LangGraph's executor threads, so the
+        event loop stays free while they wait on ChromaDB and the LLM.
+        
+        Args:
+            state: Initial graph state
+            
+        Returns:
+            Final graph state after execution
+        """
+        return await self.graph.ainvoke(state)
+    
+    def stream(self, state: GraphState, stream_mode: Any = None):
         """
         Stream graph execution (yields state after each node).
         
         Args:
             state: Initial graph state
+            stream_mode: Optional LangGraph stream mode(s). "custom" yields the
+                        {"response_delta": chunk} token updates from generation.
             
         Yields:
-            State updates after each node execution
+            State updates after each node execution (or the requested mode's output)
         """
-        for state_update in self.graph.stream(state):
-            yield state_update
+        if stream_mode is None:
+            yield from self.graph.stream(state)
+        else:
+            yield from self.graph.stream(state, stream_mode=stream_mode)
 
 
 def get_graph() -> Any:  # Using Any to avoid type issues with lazy import
@@ -422,10 +471,15 @@ def get_graph() -> Any:  # Using Any to avoid type issues with lazy import
     
     Returns:
         Compiled StateGraph
+        
+    Raises:
+        RuntimeError: If the graph failed to compile (chained to the cause)
     """
+    app = _load_app()
     if app is None:
         raise RuntimeError(
-            "Graph is not compiled. Make sure langgraph is installed: pip install langgraph"
-        )
+            f"Graph is not compiled: {_APP_ERROR}. "
+            "Make sure langgraph is installed: pip install langgraph"
+        ) from _APP_ERROR
     return app
 
@@ -5,25 +5,278 @@ This module contains all the node functions that process the GraphState.
 Each node function takes state as input, processes it, and returns updated state.
 """
 
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List
+from langgraph_service.shared import shared_instance
 from langgraph_service.graph.state import GraphState
 from langgraph_service.graph.query_classifier import QueryClassifier, QueryType
 from langgraph_service.rag.retriever import ChromaDBRetriever
+from langgraph_service.rag.compressor import compress
 from langgraph_service.llm.ollama_chat import OllamaChatClient
+from langgraph_service.llm.vllm_chat import VLLMChatClient
+from langgraph_service.llm.tokenizer import (
+    truncate_to_token_budget,
+    trim_history_to_token_budget,
+)
+from langgraph_service.cache.semantic_cache import SemanticCache, context_key
+from langgraph_service.cache.sqlite_store import SQLiteCacheStore
+from db.chromadb_service import ChromaDBService
+
+try:
+    from langgraph.config import get_stream_writer
+except ImportError:
+    # Older langgraph versions have no custom stream mode
+    get_stream_writer = None
+
 from langgraph_service.config import (
+    LLM_BACKEND,
     RETRIEVAL_TOP_K,
     SIMILARITY_THRESHOLD,
     MAX_CONTEXT_LENGTH,
+    MAX_CONTEXT_TOKENS,
+    CHROMADB_PERSIST_DIRECTORY,
+    ENABLE_SEMANTIC_CACHE,
+    SEMANTIC_CACHE_PERSIST,
+    SEMANTIC_CACHE_STORE,
+    SEMANTIC_CACHE_DB,
+    SEMANTIC_CACHE_COLLECTION,
+    MAX_HISTORY_LENGTH,
+    MAX_HISTORY_TOKENS,
+)
+
+
+# Prompts shared by the graph nodes and the simple pipeline
+RAG_SYSTEM_PROMPT = (
+    "You are a helpful customer support assistant. "
+    "Use the provided context from the knowledge base to answer questions accurately. "
+    "If the context doesn't contain relevant information, say so. "
+    "Be concise and helpful."
+)
+
+RAG_USER_TEMPLATE = """Context from knowledge base:
+{context}
+
+Question: {query}
+
+Please provide a helpful answer based on the context above."""
+
+DIRECT_SYSTEM_PROMPT = (
+    "You are a helpful assistant. "
+    "Answer questions directly and helpfully."
 )
 
 
-def format_context(documents: list, max_length: int = MAX_CONTEXT_LENGTH) -> str:
+# Node dependencies are built on first use and shared by every graph run.
+# They hold configuration and connections only, no per-query state.
+
+@shared_instance
+def get_classifier() -> QueryClassifier:
+    """Get the shared query classifier."""
+    return QueryClassifier()
+
+
+@shared_instance
+def get_retriever() -> ChromaDBRetriever:
+    """Get the shared ChromaDB retriever."""
+    return ChromaDBRetriever()
+
+
+@shared_instance
+def get_llm_client() -> OllamaChatClient:
+    """Get the shared chat client for the configured LLM_BACKEND."""
+    if LLM_BACKEND == "vllm":
+        return VLLMChatClient()
+    return OllamaChatClient()
+
+
+@shared_instance
+def get_semantic_cache() -> SemanticCache:
+    """Get the shared semantic response cache (persisted if SEMANTIC_CACHE_PERSIST)."""
+    store = None
+    if SEMANTIC_CACHE_PERSIST:
+        try:
+            if SEMANTIC_CACHE_STORE == "chroma":
+                store = ChromaDBService(
+                    collection_name=SEMANTIC_CACHE_COLLECTION,
+                    persist_directory=CHROMADB_PERSIST_DIRECTORY,
+                    create_collection=True
+                )
+            else:
+                store = SQLiteCacheStore(SEMANTIC_CACHE_DB)
+        except Exception:
+            # Fall back to an in-memory cache
+            store = None
+    return SemanticCache(store=store)
+
+
+def _stream_writer():
+    """Get the graph's stream writer, or None outside a graph run."""
+    if get_stream_writer is None:
+        return None
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        # Called outside a graph run
+        return None
+
+
+def _generate(messages: List[Dict[str, str]]) -> str:
+    """
+    Generate an LLM response, streaming tokens to the graph's stream writer.
+    
+    When the graph runs with stream_mode="custom", each text chunk is
+    emitted as {"response_delta": chunk} as soon as Ollama produces it.
+    The full response is returned either way.
+    """
+    writer = _stream_writer()
+    if writer is None:
+        return get_llm_client().generate_response(messages)
+    
+    chunks = []
+    for chunk in get_llm_client().stream_response(messages):
+        chunks.append(chunk)
+        writer({"response_delta": chunk})
+    
+    response = "".join(chunks).strip()
+    if not response:
+        raise ConnectionError("Empty response from Ollama API")
+    return response
+
+
+def _drop_repeated_turns(messages_history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    Drop exchanges whose user message is repeated right after them.
+    
+    When the user asks the same thing twice in a row, only the latest
+    exchange is kept, so the repeat does not spend the history budget.
+    """
+    kept: List[Dict[str, str]] = []
+    for message in messages_history:
+        if message.get("role") == "user" and kept:
+            content = message.get("content")
+            previous = kept[-1]
+            if previous.get("role") == "user" and previous.get("content") == content:
+                kept.pop()
+            elif (
+                len(kept) >= 2
+                and previous.get("role") == "assistant"
+                and kept[-2].get("role") == "user"
+                and kept[-2].get("content") == content
+            ):
+                del kept[-2:]
+        kept.append(message)
+    return kept
+
+
+def _trim_history(messages_history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Keep the recent, distinct history that fits the message and token limits."""
+    recent = _drop_repeated_turns(messages_history)[-MAX_HISTORY_LENGTH:]
+    return trim_history_to_token_budget(recent, MAX_HISTORY_TOKENS)
+
+
+def _build_rag_messages(
+    query: str,
+    context: str,
+    messages_history: List[Dict[str, str]],
+) -> List[Dict[str, str]]:
+    """Build the chat messages for answering a query from knowledge base context."""
+    # Create RAG prompt
+    user_message = RAG_USER_TEMPLATE.format(context=context, query=query)
+    
+    # Build messages (include history if available)
+    messages = [{"role": "system", "content": RAG_SYSTEM_PROMPT}]
+    
+    # Add recent conversation history (prompt length drives prefill time)
+    messages.extend(_trim_history(messages_history))
+    
+    # Add current query
+    messages.append({"role": "user", "content": user_message})
+    
+    return messages
+
+
+def _build_direct_messages(
+    query: str,
+    messages_history: List[Dict[str, str]],
+) -> List[Dict[str, str]]:
+    """Build the chat messages for answering a query without retrieved context."""
+    # Build messages
+    messages = [{"role": "system", "content": DIRECT_SYSTEM_PROMPT}]
+    
+    # Add recent conversation history (prompt length drives prefill time)
+    messages.extend(_trim_history(messages_history))
+    
+    # Add current query
+    messages.append({"role": "user", "content": query})
+    
+    return messages
+
+
+def _query_variants(query: str, query_variants: List[str]) -> List[str]:
+    """
+    Get the alternative phrasings to search alongside the query.
+    
+    These are the variants set in the state (e.g. by a query rewriting
+    node) plus the query's matched domain keywords, a short keyword-only
+    phrasing that often matches the knowledge base better than a long
+    conversational question. Classification results are cached, so the
+    keywords are not computed twice per query.
+    """
+    variants = [variant for variant in query_variants if variant != query]
+    
+    _, _, classification_metadata = get_classifier().classify_query(query)
+    keywords = classification_metadata.get("matched_keywords")
+    if keywords:
+        keyword_query = " ".join(keywords)
+        if keyword_query.lower() != query.strip().lower():
+            variants.append(keyword_query)
+    
+    return variants
+
+
+def _semantic_cache_context(state: GraphState) -> int:
+    """
+    Get the semantic cache context key of a turn.
+    
+    The answer also depends on the history sent to the LLM and on a custom
+    system prompt, so a follow-up (e.g. "and for business accounts?") is
+    only served responses cached in the same context. Standalone turns
+    share one context, so they hit each other's entries.
+    """
+    return context_key(
+        _trim_history(state.get("messages") or []),
+        state.get("metadata", {}).get("system_prompt")
+    )
+
+
+def _cache_response(state: GraphState, response: str) -> None:
+    """Store a generated response in the semantic cache under the query embedding."""
+    query_embedding = state.get("query_embedding")
+    if not ENABLE_SEMANTIC_CACHE or query_embedding is None or not response:
+        return
+    
+    # Answers generated without the knowledge base (retrieval failed) are not reused
+    if "retrieval_error" in state.get("metadata", {}):
+        return
+    
+    get_semantic_cache().put(query_embedding, response, _semantic_cache_context(state))
+
+
+def format_context(
+    documents: list,
+    max_length: int = MAX_CONTEXT_LENGTH,
+    max_tokens: int = MAX_CONTEXT_TOKENS,
+    query: str = "",
+) -> str:
     """
     Format retrieved documents into a context string for the LLM.
     
     Args:
         documents: List of document dictionaries with 'text', 'score', etc.
-        max_length: Maximum length of the formatted context
+        max_length: Maximum length of the formatted context (in characters)
+        max_tokens: Maximum length of the formatted context (in tokens)
+        query: Optional query; a document that does not fit is shortened
+               to its most query-relevant sentences instead of truncated
         
     Returns:
         Formatted context string
@@ -36,24 +289,75 @@ def format_context(documents: list, max_length: int = MAX_CONTEXT_LENGTH) -> str
     
     for i, doc in enumerate(documents, 1):
         text = doc.get("text", "")
-        score = doc.get("score", 0)
         
         # Format: "Document 1 (relevance: 0.85): ..."
-        doc_text = f"Document {i} (relevance: {score:.2f}): {text}"
+        # The header is formatted once and reused if the text gets truncated
+        header = f"Document {i} (relevance: {doc.get('score', 0):.2f}): "
         
         # Check if adding this document would exceed max length
-        if current_length + len(doc_text) > max_length:
+        # (sized before concatenating, so rejected text is never copied)
+        if current_length + len(header) + len(text) > max_length:
             # Truncate this document if needed
             remaining = max_length - current_length - 50  # Reserve space for formatting
-            if remaining > 0:
-                doc_text = f"Document {i} (relevance: {score:.2f}): {text[:remaining]}..."
-            else:
+            if remaining <= 0:
                 break
+            
+            compressed = compress(text, query, remaining) if query else ""
+            doc_text = header + (compressed or text[:remaining] + "...")
+        else:
+            doc_text = header + text
         
         context_parts.append(doc_text)
         current_length += len(doc_text)
     
-    return "\n\n".join(context_parts)
+    # Enforce the token budget to bound prompt prefill cost
+    return "\n\n".join(truncate_to_token_budget(context_parts, max_tokens))
+
+
+def semantic_cache_node(state: GraphState) -> Dict[str, Any]:
+    """
+    Node: Look up the query in the semantic response cache.
+    
+    This node embeds the query and checks whether a similar query has
+    already been answered. On a hit it sets the response and marks
+    metadata["semantic_cache_hit"], so the graph can skip straight to
+    the respond node. The embedding is kept in the state either way.
+    Only responses cached in the same conversation context are served
+    (see _semantic_cache_context).
+    
+    Args:
+        state: Current graph state
+        
+    Returns:
+        Dictionary with updated query_embedding (and response/metadata on a hit)
+    """
+    query = state.get("query", "")
+    
+    if not query or not ENABLE_SEMANTIC_CACHE:
+        return {}
+    
+    try:
+        query_embedding = get_retriever().embed_query(query)
+    except Exception:
+        # Treat as a miss; retrieval will report the connection problem
+        return {}
+    
+    cache_context = _semantic_cache_context(state)
+    cached_response = get_semantic_cache().lookup(query_embedding, cache_context)
+    if cached_response is None:
+        return {
+            "query_embedding": query_embedding
+        }
+    
+    # Update metadata
+    metadata = state.get("metadata", {})
+    metadata["semantic_cache_hit"] = True
+    
+    return {
+        "query_embedding": query_embedding,
+        "response": cached_response,
+        "metadata": metadata
+    }
 
 
 def classify_query_node(state: GraphState) -> Dict[str, Any]:
@@ -81,7 +385,7 @@ def classify_query_node(state: GraphState) -> Dict[str, Any]:
         }
     
     # Classify query
-    classifier = QueryClassifier()
+    classifier = get_classifier()
     query_type, confidence, classification_metadata = classifier.classify_query(query)
     
     # Update metadata
@@ -102,7 +406,8 @@ def retrieve_node(state: GraphState) -> Dict[str, Any]:
     Node: Retrieve relevant documents from ChromaDB.
     
     This node retrieves documents based on the query using semantic similarity.
-    Updates the retrieved_docs field.
+    It runs alongside classification; the documents are only used if the
+    query is routed down the RAG path. Updates the retrieved_docs field.
     
     Args:
         state: Current graph state
@@ -117,22 +422,30 @@ def retrieve_node(state: GraphState) -> Dict[str, Any]:
             "retrieved_docs": []
         }
     
-    # Retrieve documents
-    retriever = ChromaDBRetriever()
+    # Retrieve documents (all phrasings of the query in one batched search)
+    retriever = get_retriever()
+    variants = _query_variants(query, state.get("query_variants") or [])
     try:
-        retrieved_docs = retriever.retrieve_relevant_docs(
-            query=query,
-            top_k=RETRIEVAL_TOP_K,
-            similarity_threshold=SIMILARITY_THRESHOLD
-        )
+        if variants:
+            retrieved_docs = retriever.retrieve_for_queries(
+                queries=[query, *variants],
+                top_k=RETRIEVAL_TOP_K,
+                similarity_threshold=SIMILARITY_THRESHOLD,
+                query_embedding=state.get("query_embedding")
+            )
+        else:
+            retrieved_docs = retriever.retrieve_relevant_docs(
+                query=query,
+                top_k=RETRIEVAL_TOP_K,
+                similarity_threshold=SIMILARITY_THRESHOLD,
+                query_embedding=state.get("query_embedding")
+            )
     except Exception as e:
-        # Update metadata with error
-        metadata = state.get("metadata", {})
-        metadata["retrieval_error"] = str(e)
-        
+        # Report the error as a metadata update (merged with the
+        # classifier's update, which runs in the same step)
         return {
             "retrieved_docs": [],
-            "metadata": metadata
+            "metadata": {"retrieval_error": str(e)}
         }
     
     return {
@@ -153,10 +466,11 @@ def format_context_node(state: GraphState) -> Dict[str, Any]:
     Returns:
         Dictionary with updated context
     """
+    query = state.get("query", "")
     retrieved_docs = state.get("retrieved_docs", [])
     
     # Format context
-    context = format_context(retrieved_docs, max_length=MAX_CONTEXT_LENGTH)
+    context = format_context(retrieved_docs, max_length=MAX_CONTEXT_LENGTH, query=query)
     
     # Update metadata
     metadata = state.get("metadata", {})
@@ -200,36 +514,11 @@ def generate_node(state: GraphState) -> Dict[str, Any]:
             "response": "I didn't receive a valid query. Please try again."
         }
     
-    # Create RAG prompt
-    system_prompt = (
-        "You are a helpful customer support assistant. "
-        "Use the provided context from the knowledge base to answer questions accurately. "
-        "If the context doesn't contain relevant information, say so. "
-        "Be concise and helpful."
-    )
-    
-    user_message = f"""Context from knowledge base:
-{context}
-
-Question: {query}
-
-Please provide a helpful answer based on the context above."""
-    
-    # Build messages (include history if available)
-    messages = []
-    if system_prompt:
-        messages.append({"role": "system", "content": system_prompt})
-    
-    # Add conversation history
-    messages.extend(messages_history)
-    
-    # Add current query
-    messages.append({"role": "user", "content": user_message})
+    messages = _build_rag_messages(query, context, messages_history)
     
-    # Generate response
-    llm_client = OllamaChatClient()
+    # Generate response (streamed when the graph is streaming)
     try:
-        response = llm_client.generate_response(messages)
+        response = _generate(messages)
     except Exception as e:
         # Update metadata with error
         metadata = state.get("metadata", {})
@@ -240,6 +529,9 @@ Please provide a helpful answer based on the context above."""
             "metadata": metadata
         }
     
+    # Reuse this answer for similar queries
+    _cache_response(state, response)
+    
     return {
         "response": response
     }
@@ -266,27 +558,11 @@ def direct_answer_node(state: GraphState) -> Dict[str, Any]:
             "response": "I didn't receive a valid query. Please try again."
         }
     
-    # Create direct answer prompt
-    system_prompt = (
-        "You are a helpful assistant. "
-        "Answer questions directly and helpfully."
-    )
+    messages = _build_direct_messages(query, messages_history)
     
-    # Build messages
-    messages = []
-    if system_prompt:
-        messages.append({"role": "system", "content": system_prompt})
-    
-    # Add conversation history
-    messages.extend(messages_history)
-    
-    # Add current query
-    messages.append({"role": "user", "content": query})
-    
-    # Generate response
-    llm_client = OllamaChatClient()
+    # Generate response (streamed when the graph is streaming)
     try:
-        response = llm_client.generate_response(messages)
+        response = _generate(messages)
     except Exception as e:
         # Update metadata with error
         metadata = state.get("metadata", {})
@@ -297,11 +573,103 @@ def direct_answer_node(state: GraphState) -> Dict[str, Any]:
             "metadata": metadata
         }
     
+    # Reuse this answer for similar queries
+    _cache_response(state, response)
+    
     return {
         "response": response
     }
 
 
+def speculative_answer_node(state: GraphState) -> Dict[str, Any]:
+    """
+    Node: Answer an ambiguously classified query down both paths at once.
+    
+    This node generates the RAG answer (from the documents retrieved
+    alongside classification) and the direct answer concurrently, keeps
+    whichever succeeds first and does not wait for the other. Routing runs
+    before the parallel retrieval result is visible, so the RAG candidate
+    is only started here, when documents were found. Used only when
+    ENABLE_SPECULATIVE_EXEC is on. Updates the response field.
+    
+    This has two costs. Candidates are generated whole, so a streaming
+    caller gets no tokens on this route until the race is decided; the
+    winner is then emitted as a single {"response_delta": ...} chunk.
+    And the losing request cannot be cancelled once Ollama has started
+    it, so each speculative turn keeps a second full generation running
+    on the backend.
+    
+    Args:
+        state: Current graph state
+        
+    Returns:
+        Dictionary with updated response, context and metadata
+    """
+    query = state.get("query", "")
+    messages_history = state.get("messages", [])
+    retrieved_docs = state.get("retrieved_docs", [])
+    
+    if not query:
+        return {
+            "response": "I didn't receive a valid query. Please try again."
+        }
+    
+    # Without documents the RAG answer has nothing to add, so only the
+    # direct answer runs
+    context = format_context(retrieved_docs, max_length=MAX_CONTEXT_LENGTH, query=query)
+    candidates = {"direct": _build_direct_messages(query, messages_history)}
+    if context:
+        candidates["rag"] = _build_rag_messages(query, context, messages_history)
+    
+    llm_client = get_llm_client()
+    pool = ThreadPoolExecutor(max_workers=len(candidates))
+    futures = {
+        pool.submit(llm_client.generate_response, messages): path
+        for path, messages in candidates.items()
+    }
+    
+    winner = None
+    response = ""
+    errors = []
+    try:
+        for future in as_completed(futures):
+            try:
+                response = future.result()
+            except Exception as e:
+                errors.append(str(e))
+                continue
+            winner = futures[future]
+            break
+    finally:
+        # Don't wait for the losing request (a request already sent to
+        # Ollama keeps running there until it finishes)
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    if winner is None:
+        return {
+            "response": f"I encountered an error while generating a response: {errors[-1]}",
+            "metadata": {"generation_error": errors[-1]}
+        }
+    
+    # Candidates were not streamed, so stream the winner now that it is known
+    writer = _stream_writer()
+    if writer is not None:
+        writer({"response_delta": response})
+    
+    # Reuse this answer for similar queries
+    _cache_response(state, response)
+    
+    return {
+        "response": response,
+        "context": context if winner == "rag" else "",
+        "metadata": {
+            "speculative_winner": winner,
+            "context_length": len(context),
+            "docs_count": len(retrieved_docs),
+        }
+    }
+
+
 def respond_node(state: GraphState) -> Dict[str, Any]:
     """
     Node: Final response formatting and message history update.
@@ -313,27 +681,22 @@ def respond_node(state: GraphState) -> Dict[str, Any]:
         state: Current graph state
         
     Returns:
-        Dictionary with updated messages
+        Dictionary with the new messages of this turn
     """
     query = state.get("query", "")
     response = state.get("response", "")
-    current_messages = state.get("messages", [])
     
-    # Add user message to history
-    updated_messages = current_messages.copy()
+    # Return only this turn's messages: the messages reducer appends them
+    # to the existing history, so the history is not copied on every turn
+    new_messages = []
     if query:
-        updated_messages.append({"role": "user", "content": query})
+        new_messages.append({"role": "user", "content": query})
     
-    # Add assistant response to history
     if response:
-        updated_messages.append({"role": "assistant", "content": response})
-    
-    # Update metadata
-    metadata = state.get("metadata", {})
-    metadata["response_length"] = len(response)
+        new_messages.append({"role": "assistant", "content": response})
     
     return {
-        "messages": updated_messages,
-        "metadata": metadata
+        "messages": new_messages,
+        "metadata": {"response_length": len(response)}
     }
 
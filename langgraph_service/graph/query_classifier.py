@@ -6,9 +6,21 @@ the appropriate response strategy.
 """
 
 from enum import Enum
+from functools import lru_cache
 from typing import Dict, Tuple, List
 import re
 
+from langgraph_service.shared import shared_instance
+
+# Number of recent queries whose classification is remembered per classifier
+CLASSIFY_CACHE_SIZE = 4096
+
+# Standalone greetings, matched at the start or end of the query
+_SIMPLE_GREETINGS = ("hi", "hello", "hey", "thanks", "thank you", "bye")
+
+# Acknowledgment phrases (thanks, etc.), with or without a following "for ..."
+_ACKNOWLEDGMENT_RE = re.compile(r"^(thanks|thank you|thx|appreciate)", re.IGNORECASE)
+
 
 class QueryType(Enum):
     """Enumeration of query types."""
@@ -70,6 +82,22 @@ class QueryClassifier:
             r"\?$",  # Ends with question mark
             r"^(what|who|when|where|why|how|which|can|could|should|would|is|are|do|does|did)",
         ]
+        
+        # Compile each pattern list once into a single alternation, so one
+        # search covers the whole category
+        self._greeting_re = self._compile_any(self.greeting_patterns)
+        simple = "|".join(_SIMPLE_GREETINGS)
+        self._simple_greeting_re = re.compile(rf"^(?:{simple})(?:\s|\?)|(?:{simple})$", re.IGNORECASE)
+        self._question_re = self._compile_any(self.question_patterns)
+        
+        # Classification is deterministic, and many users send the same short
+        # messages ("hi", "thanks"), so repeated queries are a cache lookup
+        self._classify_cached = lru_cache(maxsize=CLASSIFY_CACHE_SIZE)(self._classify)
+    
+    @staticmethod
+    def _compile_any(patterns: List[str]) -> "re.Pattern[str]":
+        """Compile patterns into one case-insensitive regex matching any of them."""
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
     
     def classify_query(self, query: str) -> Tuple[QueryType, float, Dict]:
         """
@@ -84,16 +112,41 @@ class QueryClassifier:
             - float: Confidence score (0.0 to 1.0)
             - Dict: Additional metadata about the classification
         """
-        if not query or not query.strip():
+        query_type, confidence, metadata = self._classify_cached(query)
+        
+        # Copy the metadata (and its keyword list) so callers cannot change the cached result
+        metadata = {
+            key: list(value) if isinstance(value, list) else value
+            for key, value in metadata.items()
+        }
+        return query_type, confidence, metadata
+    
+    def classify_batch(self, queries: List[str]) -> List[Tuple[QueryType, float, Dict]]:
+        """
+        Classify several queries.
+        
+        Args:
+            queries: The user query strings
+            
+        Returns:
+            List of (QueryType, confidence, metadata) tuples, one per query
+        """
+        return list(map(self.classify_query, queries))
+    
+    def _classify(self, query: str) -> Tuple[QueryType, float, Dict]:
+        """Classify a query without the cache (see classify_query)."""
+        # Strip once: the stripped text serves both the empty check and the
+        # lowercased copy used by every pattern check
+        stripped = query.strip() if query else ""
+        if not stripped:
             return QueryType.UNCLEAR, 1.0, {
                 "reason": "empty_query",
                 "original_query": query
             }
         
-        query_lower = query.lower().strip()
-        query_length = len(query_lower)
+        query_length = len(stripped)
         
-        # Check for empty or very short queries
+        # Check for very short queries before building the lowercased copy
         if query_length < 2:
             return QueryType.UNCLEAR, 1.0, {
                 "reason": "too_short",
@@ -101,14 +154,16 @@ class QueryClassifier:
                 "length": query_length
             }
         
+        query_lower = stripped.lower()
+        
         # Check for greetings first (simple greetings take priority)
         greeting_score = self._check_greeting(query_lower)
         
         # Check for RAG keywords (domain-specific)
-        rag_score = self._check_rag_keywords(query_lower)
+        rag_score, rag_matched = self._check_rag_keywords(query_lower)
         
         # Check for direct answer keywords
-        direct_score = self._check_direct_answer_keywords(query_lower)
+        direct_score, direct_matched = self._check_direct_answer_keywords(query_lower)
         
         # If strong greeting pattern, prioritize greeting (unless very strong RAG signal)
         # This handles cases like "Thanks for your help" which should be greeting
@@ -140,7 +195,7 @@ class QueryClassifier:
                 "original_query": query,
                 "rag_score": rag_score,
                 "is_question": is_question,
-                "matched_keywords": self._get_matched_keywords(query_lower, self.rag_keywords)
+                "matched_keywords": rag_matched
             }
         
         elif direct_score > 0.5:
@@ -151,7 +206,7 @@ class QueryClassifier:
                 "original_query": query,
                 "direct_score": direct_score,
                 "is_question": is_question,
-                "matched_keywords": self._get_matched_keywords(query_lower, self.direct_answer_keywords)
+                "matched_keywords": direct_matched
             }
         
         elif is_question:
@@ -178,42 +233,41 @@ class QueryClassifier:
     def _check_greeting(self, query_lower: str) -> float:
         """Check if query matches greeting patterns."""
         # Check exact greeting patterns first
-        for pattern in self.greeting_patterns:
-            if re.search(pattern, query_lower, re.IGNORECASE):
-                return 0.9
+        if self._greeting_re.search(query_lower):
+            return 0.9
         
         # Check for simple greetings (but not if they're part of a longer query)
-        simple_greetings = ["hi", "hello", "hey", "thanks", "thank you", "bye"]
-        for greeting in simple_greetings:
-            # Only match if it's a standalone word or at the start
-            if re.search(rf"^{greeting}\s|{greeting}$|^{greeting}\?", query_lower, re.IGNORECASE):
-                return 0.8
+        # Only match if it's a standalone word or at the start
+        if self._simple_greeting_re.search(query_lower):
+            return 0.8
         
         return 0.0
     
-    def _check_rag_keywords(self, query_lower: str) -> float:
-        """Check how many RAG keywords are present."""
-        matches = sum(1 for keyword in self.rag_keywords if keyword in query_lower)
+    def _check_rag_keywords(self, query_lower: str) -> Tuple[float, List[str]]:
+        """Score the RAG keywords present, returning (score, matched keywords)."""
+        matched = self._get_matched_keywords(query_lower, self.rag_keywords)
+        matches = len(matched)
         
         if matches == 0:
-            return 0.0
+            return 0.0, matched
         elif matches == 1:
-            return 0.5
+            return 0.5, matched
         elif matches == 2:
-            return 0.75
+            return 0.75, matched
         else:
-            return min(0.9, 0.5 + (matches * 0.1))
+            return min(0.9, 0.5 + (matches * 0.1)), matched
     
-    def _check_direct_answer_keywords(self, query_lower: str) -> float:
-        """Check how many direct answer keywords are present."""
-        matches = sum(1 for keyword in self.direct_answer_keywords if keyword in query_lower)
+    def _check_direct_answer_keywords(self, query_lower: str) -> Tuple[float, List[str]]:
+        """Score the direct answer keywords present, returning (score, matched keywords)."""
+        matched = self._get_matched_keywords(query_lower, self.direct_answer_keywords)
+        matches = len(matched)
         
         if matches == 0:
-            return 0.0
+            return 0.0, matched
         elif matches == 1:
-            return 0.5
-        elif matches >= 2:
-            return 0.8
+            return 0.5, matched
+        else:
+            return 0.8, matched
     
     def _is_question(self, query_lower: str) -> bool:
         """Check if query is a question."""
@@ -222,26 +276,22 @@ class QueryClassifier:
             return True
         
         # Check question patterns
-        for pattern in self.question_patterns:
-            if re.search(pattern, query_lower, re.IGNORECASE):
-                return True
-        
-        return False
+        return self._question_re.search(query_lower) is not None
     
     def _get_matched_keywords(self, query_lower: str, keywords: List[str]) -> List[str]:
         """Get list of matched keywords."""
-        return [kw for kw in keywords if kw in query_lower]
+        # filter() keeps the substring checks in C (no frame per keyword)
+        return list(filter(query_lower.__contains__, keywords))
     
     def _is_simple_acknowledgment(self, query_lower: str) -> bool:
         """Check if query is a simple acknowledgment (thanks, etc.)."""
-        acknowledgment_patterns = [
-            r"^(thanks|thank you|thx|appreciate)",
-            r"^(thanks|thank you|thx|appreciate)\s+for",
-        ]
-        for pattern in acknowledgment_patterns:
-            if re.search(pattern, query_lower, re.IGNORECASE):
-                return True
-        return False
+        return _ACKNOWLEDGMENT_RE.search(query_lower) is not None
+
+
+@shared_instance
+def _default_classifier() -> QueryClassifier:
+    """Get the classifier shared by classify_query()."""
+    return QueryClassifier()
 
 
 def classify_query(query: str) -> Tuple[QueryType, float, Dict]:
@@ -254,6 +304,5 @@ def classify_query(query: str) -> Tuple[QueryType, float, Dict]:
     Returns:
         Tuple of (QueryType, confidence, metadata)
     """
-    classifier = QueryClassifier()
-    return classifier.classify_query(query)
+    return _default_classifier().classify_query(query)
 
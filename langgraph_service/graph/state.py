@@ -5,7 +5,7 @@ This module defines the GraphState TypedDict that will flow through
 the LangGraph. All nodes will receive and update this state.
 """
 
-from typing import TypedDict, List, Dict, Any, Annotated
+from typing import TypedDict, List, Dict, Any, Annotated, Optional
 
 # Try to import add_messages from different possible locations
 # (LangGraph versions may have it in different places)
@@ -24,6 +24,21 @@ except ImportError:
                 return left + right if left else right
 
 
+def merge_metadata(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge a node's metadata update into the current metadata.
+    
+    Nodes that run in the same step (classify and retrieve) may both
+    update metadata, so updates are merged key by key instead of replacing
+    the whole dict. Later keys win.
+    """
+    if not left:
+        return right or {}
+    if not right:
+        return left
+    return {**left, **right}
+
+
 class GraphState(TypedDict):
     """
     State structure that flows through the LangGraph.
@@ -38,6 +53,8 @@ class GraphState(TypedDict):
         context: Formatted context string from retrieved documents
         response: Generated response from the LLM
         metadata: Additional metadata about the processing
+        query_embedding: Embedding of the query (set by the semantic cache lookup)
+        query_variants: Alternative phrasings of the query, searched together with it
     """
     
     # Conversation history
@@ -60,7 +77,16 @@ class GraphState(TypedDict):
     
     # Additional metadata
     # Contains classification info, confidence scores, errors, etc.
-    metadata: Dict[str, Any]
+    # Annotated with merge_metadata so parallel node updates are combined
+    metadata: Annotated[Dict[str, Any], merge_metadata]
+    
+    # Embedding of the current query
+    # Computed once per run and reused when storing the response in the cache
+    query_embedding: Optional[List[float]]
+    
+    # Alternative phrasings of the current query (e.g. from query rewriting)
+    # Retrieval searches them in the same batch as the query and fuses the results
+    query_variants: List[str]
 
 
 def create_initial_state(query: str) -> GraphState:
@@ -79,7 +105,9 @@ def create_initial_state(query: str) -> GraphState:
         retrieved_docs=[],
         context="",
         response="",
-        metadata={}
+        metadata={},
+        query_embedding=None,
+        query_variants=[]
     )
 
 
@@ -101,7 +129,9 @@ def create_state_from_dict(data: Dict[str, Any]) -> GraphState:
         retrieved_docs=data.get("retrieved_docs", []),
         context=data.get("context", ""),
         response=data.get("response", ""),
-        metadata=data.get("metadata", {})
+        metadata=data.get("metadata", {}),
+        query_embedding=data.get("query_embedding"),
+        query_variants=data.get("query_variants", [])
     )
 
 
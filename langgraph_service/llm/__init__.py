@@ -1,12 +1,17 @@
 """
 LLM (Large Language Model) module for LangGraph RAG service.
 
-This module provides components for interacting with LLMs, specifically Ollama.
+This module provides components for interacting with LLMs, Ollama and vLLM.
 """
 
 from langgraph_service.llm.ollama_chat import OllamaChatClient
+from langgraph_service.llm.vllm_chat import VLLMChatClient
+from langgraph_service.llm.tokenizer import get_tokenizer, truncate_to_token_budget
 
 __all__ = [
     "OllamaChatClient",
+    "VLLMChatClient",
+    "get_tokenizer",
+    "truncate_to_token_budget",
 ]
 
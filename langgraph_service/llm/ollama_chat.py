@@ -5,14 +5,37 @@ This module provides functionality to interact with Ollama's chat API
 for generating LLM responses.
 """
 
+import json
 import requests
-from typing import List, Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Any, Iterator, Optional, Union
 from langgraph_service.config import (
     OLLAMA_CHAT_API_URL,
     CHAT_MODEL,
     OLLAMA_TIMEOUT,
+    OLLAMA_KEEP_ALIVE,
 )
 
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    # orjson is optional: it only speeds up encoding and decoding API bodies
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+    _loads = json.loads
+
+# Request bodies are encoded with _dumps and sent as raw data
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Message roles accepted by the chat API
+_VALID_ROLES = frozenset(("system", "user", "assistant"))
+
+# Maximum number of keep-alive connections a client keeps open to the API;
+# concurrent requests beyond this open extra connections that are not reused
+HTTP_POOL_SIZE = 10
+
 
 class OllamaChatClient:
     """
@@ -30,6 +53,7 @@ class OllamaChatClient:
         model: str = CHAT_MODEL,
         api_url: str = OLLAMA_CHAT_API_URL,
         timeout: int = OLLAMA_TIMEOUT,
+        keep_alive: Optional[str] = OLLAMA_KEEP_ALIVE,
     ):
         """
         Initialize the Ollama chat client.
@@ -38,17 +62,33 @@ class OllamaChatClient:
             model: Name of the chat model (default from config)
             api_url: Ollama chat API URL (default from config)
             timeout: Request timeout in seconds (default from config)
+            keep_alive: How long Ollama keeps the model loaded after each
+                       request (default from config)
         """
         self.model = model
         self.api_url = api_url
         self.timeout = timeout
+        self.keep_alive = keep_alive
+        
+        # Keep-alive connection pool reused by every request from this client
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(_JSON_HEADERS)
+    
+    def close(self) -> None:
+        """Close the client's pooled connections."""
+        self.session.close()
     
     def generate_response(
         self,
         messages: List[Dict[str, str]],
         system_prompt: Optional[str] = None,
         stream: bool = False,
-    ) -> str:
+        options: Optional[Dict[str, Any]] = None,
+        keep_alive: Optional[str] = None,
+    ) -> Union[str, Iterator[str]]:
         """
         Generate a response from Ollama based on chat messages.
         
@@ -60,42 +100,140 @@ class OllamaChatClient:
                          {"role": "user", "content": "How are you?"}
                      ]
             system_prompt: Optional system prompt to guide the model behavior
-            stream: Whether to stream the response (not implemented yet)
+            stream: If True, return an iterator of text chunks as they are
+                   generated (same as stream_response())
+            options: Optional Ollama model options (e.g. {"num_predict": 1})
+            keep_alive: Optional duration Ollama keeps the model loaded (e.g. "30m");
+                       defaults to the client's keep_alive
             
         Returns:
-            Generated response string from the LLM
+            Generated response string from the LLM, or an iterator of
+            response chunks if stream is True
             
         Raises:
             ValueError: If messages are invalid
             ConnectionError: If Ollama API is unavailable
         """
+        if stream:
+            return self.stream_response(messages, system_prompt, options, keep_alive)
+        
+        payload = self._build_payload(messages, system_prompt, False, options, keep_alive)
+        
+        # Only the network call is guarded; failures are mapped in one place
+        try:
+            response = self.session.post(
+                self.api_url,
+                data=_dumps(payload),
+                timeout=self.timeout
+            )
+        except requests.exceptions.RequestException as e:
+            raise self._request_error(e) from e
+        
+        if response.status_code >= 400:
+            raise ConnectionError(
+                f"Ollama API returned an error: {response.status_code} {response.reason}"
+            )
+        
+        # Parse response
+        try:
+            result = _loads(response.content)
+        except ValueError as e:
+            raise ConnectionError(f"Unexpected response format from Ollama API: {e}")
+        
+        return self._response_content(result)
+    
+    def _request_error(self, error: requests.exceptions.RequestException) -> ConnectionError:
+        """Build the ConnectionError reported for a failed request to Ollama."""
+        if isinstance(error, requests.exceptions.Timeout):
+            return ConnectionError(
+                f"Request to Ollama API timed out after {self.timeout} seconds. "
+                f"Please ensure Ollama is running and the model '{self.model}' is available."
+            )
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return ConnectionError(
+                f"Failed to connect to Ollama API at {self.api_url}. "
+                f"Please ensure Ollama is running: ollama serve"
+            )
+        return ConnectionError(
+            f"Failed to generate response from Ollama: {error}. "
+            f"Please check your Ollama installation and API endpoint."
+        )
+    
+    def warmup(self) -> None:
+        """
+        Load the model with a one-token request.
+        
+        Ollama loads a model on its first request and keeps it for the
+        client's keep_alive, so this moves the load off the first user
+        query. It also opens a pooled connection for later requests.
+        
+        Raises:
+            ConnectionError: If the API is unavailable
+        """
+        self.generate_response(
+            [{"role": "user", "content": "hi"}],
+            options={"num_predict": 1}
+        )
+    
+    def _response_content(self, result: Dict[str, Any]) -> str:
+        """
+        Extract the generated text from an /api/chat response body.
+        
+        Raises:
+            ConnectionError: If the response has no content
+        """
+        message = result.get("message", {})
+        content = message.get("content", "")
+        
+        if not content:
+            raise ConnectionError("Empty response from Ollama API")
+        
+        return content.strip()
+    
+    def _build_payload(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str],
+        stream: bool,
+        options: Optional[Dict[str, Any]],
+        keep_alive: Optional[str],
+    ) -> Dict[str, Any]:
+        """
+        Validate chat messages and build the /api/chat request payload.
+        
+        Raises:
+            ValueError: If messages are invalid
+        """
         if not messages:
             raise ValueError("Messages list cannot be empty")
         
-        # Validate message format
-        for msg in messages:
-            if not isinstance(msg, dict):
-                raise ValueError("Each message must be a dictionary")
-            if "role" not in msg or "content" not in msg:
-                raise ValueError("Each message must have 'role' and 'content' keys")
-            if msg["role"] not in ["system", "user", "assistant"]:
-                raise ValueError(f"Invalid role: {msg['role']}. Must be 'system', 'user', or 'assistant'")
+        # Validate message format: one cheap pass over well-formed messages;
+        # the detailed checks only run to report an invalid one
+        if not all(
+            isinstance(msg, dict) and msg.get("role") in _VALID_ROLES and "content" in msg
+            for msg in messages
+        ):
+            for msg in messages:
+                if not isinstance(msg, dict):
+                    raise ValueError("Each message must be a dictionary")
+                if "role" not in msg or "content" not in msg:
+                    raise ValueError("Each message must have 'role' and 'content' keys")
+                if msg["role"] not in _VALID_ROLES:
+                    raise ValueError(f"Invalid role: {msg['role']}. Must be 'system', 'user', or 'assistant'")
         
-        # Prepare messages for API
-        api_messages = messages.copy()
+        # Prepare messages for API, built in one allocation. Without a system
+        # prompt the caller's list is sent as is (it is only serialized)
+        api_messages = messages
         
         # Add system prompt if provided
         if system_prompt:
-            # Check if first message is already a system message
-            if api_messages and api_messages[0].get("role") == "system":
-                # Update existing system message
-                api_messages[0]["content"] = system_prompt
+            system_message = {"role": "system", "content": system_prompt}
+            if messages[0].get("role") == "system":
+                # Replace the existing system message
+                api_messages = [system_message, *messages[1:]]
             else:
                 # Prepend system message
-                api_messages.insert(0, {
-                    "role": "system",
-                    "content": system_prompt
-                })
+                api_messages = [system_message, *messages]
         
         # Prepare request payload
         payload = {
@@ -103,55 +241,70 @@ class OllamaChatClient:
             "messages": api_messages,
             "stream": stream,
         }
+        if options:
+            payload["options"] = options
+        # Sent on every request: Ollama resets the unload timer to each
+        # request's keep_alive, so one request without it would let the
+        # model unload after Ollama's 5 minute default
+        keep_alive = keep_alive or self.keep_alive
+        if keep_alive:
+            payload["keep_alive"] = keep_alive
         
-        try:
-            # Make API request
-            response = requests.post(
-                self.api_url,
-                json=payload,
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            
-            # Parse response
-            result = response.json()
-            
-            # Extract message content
-            message = result.get("message", {})
-            content = message.get("content", "")
-            
-            if not content:
-                raise ConnectionError("Empty response from Ollama API")
+        return payload
+    
+    def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        keep_alive: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Stream a response from Ollama, yielding text as it is generated.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            system_prompt: Optional system prompt to guide the model behavior
+            options: Optional Ollama model options
+            keep_alive: Optional duration Ollama keeps the model loaded
             
-            return content.strip()
+        Yields:
+            Response text chunks, in order
             
-        except requests.exceptions.Timeout:
-            raise ConnectionError(
-                f"Request to Ollama API timed out after {self.timeout} seconds. "
-                f"Please ensure Ollama is running and the model '{self.model}' is available."
-            )
-        except requests.exceptions.ConnectionError:
-            raise ConnectionError(
-                f"Failed to connect to Ollama API at {self.api_url}. "
-                f"Please ensure Ollama is running: ollama serve"
-            )
-        except requests.exceptions.HTTPError as e:
-            raise ConnectionError(
-                f"Ollama API returned an error: {e}. "
-                f"Status code: {response.status_code if 'response' in locals() else 'unknown'}"
-            )
+        Raises:
+            ValueError: If messages are invalid
+            ConnectionError: If Ollama API is unavailable
+        """
+        payload = self._build_payload(messages, system_prompt, True, options, keep_alive)
+        
+        try:
+            with self.session.post(
+                self.api_url,
+                data=_dumps(payload),
+                timeout=self.timeout,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                
+                # Ollama streams one JSON object per line
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = _loads(line)
+                    if chunk.get("error"):
+                        raise ConnectionError(f"Ollama API returned an error: {chunk['error']}")
+                    
+                    content = chunk.get("message", {}).get("content", "")
+                    if content:
+                        yield content
+                    if chunk.get("done"):
+                        break
+                        
         except requests.exceptions.RequestException as e:
+            raise self._request_error(e) from e
+        except ValueError as e:
             raise ConnectionError(
-                f"Failed to generate response from Ollama: {e}. "
-                f"Please check your Ollama installation and API endpoint."
-            )
-        except KeyError as e:
-            raise ConnectionError(
-                f"Unexpected response format from Ollama API: missing key {e}"
-            )
-        except Exception as e:
-            raise ConnectionError(
-                f"Unexpected error while generating response: {e}"
+                f"Unexpected response format from Ollama API: {e}"
             )
     
     def chat(
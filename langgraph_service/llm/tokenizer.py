@@ -0,0 +1,104 @@
+"""
+Tokenizer helpers for LangGraph RAG Service
+
+This module provides token counting used to keep the prompt context and
+conversation history within token budgets. It uses tiktoken when it is
+installed; otherwise token budgets are skipped and only the character
+limits apply.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+# Encoding used to approximate the chat model's tokenizer
+TOKENIZER_ENCODING = "cl100k_base"
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer() -> Optional[Any]:
+    """
+    Load the tokenizer once per process.
+
+    Returns:
+        A tiktoken Encoding, or None if tiktoken is not installed or the
+        encoding files cannot be loaded (e.g. no network on first use)
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    try:
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception:
+        return None
+
+
+def truncate_to_token_budget(parts: List[str], max_tokens: int) -> List[str]:
+    """
+    Keep leading parts until their combined token count reaches max_tokens.
+
+    The part that crosses the budget is cut at token level and marked
+    with "...". Parts after it are dropped.
+
+    Args:
+        parts: Text parts in priority order
+        max_tokens: Maximum total tokens (0 or less disables the budget)
+
+    Returns:
+        List of parts that fit in the budget
+    """
+    encoding = get_tokenizer()
+    if encoding is None or max_tokens <= 0:
+        return parts
+
+    kept = []
+    used = 0
+
+    for part in parts:
+        tokens = encoding.encode(part)
+
+        if used + len(tokens) <= max_tokens:
+            kept.append(part)
+            used += len(tokens)
+            continue
+
+        remaining = max_tokens - used
+        if remaining > 0:
+            kept.append(encoding.decode(tokens[:remaining]) + "...")
+        break
+
+    return kept
+
+
+def trim_history_to_token_budget(
+    messages: List[Dict[str, str]],
+    max_tokens: int,
+) -> List[Dict[str, str]]:
+    """
+    Keep the most recent messages whose combined token count fits max_tokens.
+
+    Messages are dropped whole, oldest first, so the model never sees a
+    message cut in half.
+
+    Args:
+        messages: Conversation history, oldest first
+        max_tokens: Maximum total tokens (0 or less disables the budget)
+
+    Returns:
+        The most recent messages that fit in the budget, oldest first
+    """
+    encoding = get_tokenizer()
+    if encoding is None or max_tokens <= 0:
+        return messages
+
+    used = 0
+    start = len(messages)
+
+    for index in range(len(messages) - 1, -1, -1):
+        used += len(encoding.encode(messages[index].get("content", "")))
+        if used > max_tokens:
+            break
+        start = index
+
+    return messages[start:]
@@ -0,0 +1,207 @@
+"""
+vLLM Chat Client for LangGraph RAG Service
+
+This module provides a chat client for vLLM's OpenAI-compatible API.
+vLLM batches concurrent requests on the server (continuous batching), so
+it serves many simultaneous users far better than one-at-a-time Ollama.
+"""
+
+import requests
+from typing import List, Dict, Any, Iterator, Optional, Union
+from langgraph_service.config import (
+    VLLM_CHAT_API_URL,
+    VLLM_MODEL,
+    OLLAMA_TIMEOUT,
+)
+from langgraph_service.llm.ollama_chat import OllamaChatClient, _dumps, _loads
+
+# Ollama option names and their OpenAI-compatible equivalents
+_OPTION_NAMES = {
+    "num_predict": "max_tokens",
+    "temperature": "temperature",
+    "top_p": "top_p",
+    "seed": "seed",
+    "stop": "stop",
+}
+
+
+class VLLMChatClient(OllamaChatClient):
+    """
+    Client for vLLM's OpenAI-compatible chat completions API.
+
+    It has the same interface as OllamaChatClient, so the graph nodes can
+    use either backend. Ollama-only arguments such as keep_alive are
+    ignored, and Ollama model options are mapped to their OpenAI names.
+    """
+
+    def __init__(
+        self,
+        model: str = VLLM_MODEL,
+        api_url: str = VLLM_CHAT_API_URL,
+        timeout: int = OLLAMA_TIMEOUT,
+    ):
+        """
+        Initialize the vLLM chat client.
+
+        Args:
+            model: Name of the served model (default from config)
+            api_url: vLLM chat completions URL (default from config)
+            timeout: Request timeout in seconds (default from config)
+        """
+        super().__init__(model=model, api_url=api_url, timeout=timeout, keep_alive=None)
+
+    def generate_response(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+        stream: bool = False,
+        options: Optional[Dict[str, Any]] = None,
+        keep_alive: Optional[str] = None,
+    ) -> Union[str, Iterator[str]]:
+        """
+        Generate a response from vLLM based on chat messages.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            system_prompt: Optional system prompt to guide the model behavior
+            stream: If True, return an iterator of text chunks as they are
+                   generated (same as stream_response())
+            options: Optional Ollama-style model options (e.g. {"num_predict": 1})
+            keep_alive: Ignored; vLLM keeps the model loaded
+
+        Returns:
+            Generated response string from the LLM, or an iterator of
+            response chunks if stream is True
+
+        Raises:
+            ValueError: If messages are invalid
+            ConnectionError: If vLLM API is unavailable
+        """
+        if stream:
+            return self.stream_response(messages, system_prompt, options, keep_alive)
+
+        payload = self._build_payload(messages, system_prompt, False, options, keep_alive)
+
+        try:
+            response = self.session.post(
+                self.api_url,
+                data=_dumps(payload),
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+
+            return self._response_content(_loads(response.content))
+
+        except requests.exceptions.Timeout:
+            raise ConnectionError(
+                f"Request to vLLM API timed out after {self.timeout} seconds. "
+                f"Please ensure vLLM is serving the model '{self.model}'."
+            )
+        except requests.exceptions.ConnectionError:
+            raise ConnectionError(
+                f"Failed to connect to vLLM API at {self.api_url}. "
+                f"Please ensure vLLM is running: vllm serve {self.model}"
+            )
+        except requests.exceptions.RequestException as e:
+            raise ConnectionError(f"Failed to generate response from vLLM: {e}")
+        except ValueError as e:
+            raise ConnectionError(f"Unexpected response format from vLLM API: {e}")
+
+    def _response_content(self, result: Dict[str, Any]) -> str:
+        """
+        Extract the generated text from a chat completions response body.
+
+        Raises:
+            ConnectionError: If the response has no content
+        """
+        choices = result.get("choices") or [{}]
+        content = (choices[0].get("message") or {}).get("content") or ""
+
+        if not content:
+            raise ConnectionError("Empty response from vLLM API")
+
+        return content.strip()
+
+    def _build_payload(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str],
+        stream: bool,
+        options: Optional[Dict[str, Any]],
+        keep_alive: Optional[str],
+    ) -> Dict[str, Any]:
+        """
+        Validate chat messages and build the /v1/chat/completions payload.
+
+        Raises:
+            ValueError: If messages are invalid
+        """
+        payload = super()._build_payload(messages, system_prompt, stream, None, None)
+
+        for name, value in (options or {}).items():
+            if name in _OPTION_NAMES:
+                payload[_OPTION_NAMES[name]] = value
+
+        return payload
+
+    def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        keep_alive: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Stream a response from vLLM, yielding text as it is generated.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            system_prompt: Optional system prompt to guide the model behavior
+            options: Optional Ollama-style model options
+            keep_alive: Ignored; vLLM keeps the model loaded
+
+        Yields:
+            Response text chunks, in order
+
+        Raises:
+            ValueError: If messages are invalid
+            ConnectionError: If vLLM API is unavailable
+        """
+        payload = self._build_payload(messages, system_prompt, True, options, keep_alive)
+
+        try:
+            with self.session.post(
+                self.api_url,
+                data=_dumps(payload),
+                timeout=self.timeout,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+
+                # Server-sent events: "data: {...}" lines, ending with "data: [DONE]"
+                for line in response.iter_lines():
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == b"[DONE]":
+                        break
+
+                    choices = _loads(data).get("choices") or [{}]
+                    content = (choices[0].get("delta") or {}).get("content")
+                    if content:
+                        yield content
+
+        except requests.exceptions.Timeout:
+            raise ConnectionError(
+                f"Request to vLLM API timed out after {self.timeout} seconds. "
+                f"Please ensure vLLM is serving the model '{self.model}'."
+            )
+        except requests.exceptions.ConnectionError:
+            raise ConnectionError(
+                f"Failed to connect to vLLM API at {self.api_url}. "
+                f"Please ensure vLLM is running: vllm serve {self.model}"
+            )
+        except requests.exceptions.RequestException as e:
+            raise ConnectionError(f"Failed to stream response from vLLM: {e}")
+        except ValueError as e:
+            raise ConnectionError(f"Unexpected response format from vLLM API: {e}")
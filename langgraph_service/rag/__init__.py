@@ -5,8 +5,12 @@ This module provides components for retrieving relevant documents from ChromaDB.
 """
 
 from langgraph_service.rag.retriever import ChromaDBRetriever
+from langgraph_service.rag.embedder import BatchingEmbedder
+from langgraph_service.rag.compressor import compress
 
 __all__ = [
     "ChromaDBRetriever",
+    "BatchingEmbedder",
+    "compress",
 ]
 
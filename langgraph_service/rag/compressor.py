@@ -0,0 +1,71 @@
+"""
+Context Compressor for LangGraph RAG Service
+
+This module shortens retrieved documents by keeping the sentences most
+relevant to the query, so a document that does not fit the context budget
+contributes its useful sentences instead of an arbitrary leading slice.
+"""
+
+import math
+import re
+from typing import List, Set
+
+# Sentence boundary: whitespace after ".", "!" or "?"
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+# Terms compared between the query and each sentence
+_WORD = re.compile(r"\w+")
+
+
+def _terms(text: str) -> Set[str]:
+    """Get the set of lowercased word terms in a text."""
+    return set(_WORD.findall(text.lower()))
+
+
+def compress(text: str, query: str, max_chars: int) -> str:
+    """
+    Select the query-relevant sentences of a document within a character budget.
+
+    Sentences are scored by the query terms they contain, each weighted by
+    its inverse document frequency across the document's sentences (a term
+    found in every sentence carries no signal). The best sentences are
+    picked greedily while they fit and are returned in their original order.
+    Sentences without any query term are dropped.
+
+    Args:
+        text: Document text
+        query: The user's query
+        max_chars: Maximum length of the result (in characters)
+
+    Returns:
+        The compressed text, the original text if it already fits, or ""
+        if no relevant sentence fits the budget
+    """
+    if len(text) <= max_chars:
+        return text
+
+    sentences = _SENTENCE_SPLIT.split(text.strip())
+    sentence_terms: List[Set[str]] = [_terms(sentence) for sentence in sentences]
+
+    query_terms = _terms(query)
+    count = len(sentences)
+    scores = []
+    for terms in sentence_terms:
+        score = 0.0
+        for term in query_terms & terms:
+            frequency = sum(term in other for other in sentence_terms)
+            score += math.log(count / frequency)
+        scores.append(score)
+
+    selected = []
+    used = 0
+    for index in sorted(range(count), key=lambda i: (-scores[i], i)):
+        if scores[index] <= 0.0:
+            break
+        # Sentences are joined with a single space
+        size = len(sentences[index]) + (1 if selected else 0)
+        if used + size <= max_chars:
+            selected.append(index)
+            used += size
+
+    return " ".join(sentences[index] for index in sorted(selected))
@@ -0,0 +1,166 @@
+"""
+Batching Query Embedder for LangGraph RAG Service
+
+This module coalesces concurrent embedding requests into single batched
+calls to the Ollama embeddings API.
+"""
+
+import threading
+from typing import List, Optional
+
+import requests
+
+from utils import text_to_embeddings
+from langgraph_service.config import EMBEDDING_MODEL, OLLAMA_EMBED_API_URL
+
+# Maximum number of texts sent in one embeddings request
+MAX_EMBED_BATCH_SIZE = 32
+
+
+class _PendingEmbedding:
+    """A text waiting to be embedded, and the slot for its result."""
+
+    __slots__ = ("text", "done", "lead", "embedding", "error")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.done = threading.Event()
+        self.lead = False
+        self.embedding: Optional[List[float]] = None
+        self.error: Optional[Exception] = None
+
+    def result(self) -> List[float]:
+        if self.error is not None:
+            raise self.error
+        return self.embedding
+
+
+class BatchingEmbedder:
+    """
+    Embeds texts, batching requests that arrive while a call is in flight.
+
+    The first caller sends its text straight away, so a single query pays
+    no extra latency. Texts submitted while that request is running queue
+    up and are sent together as the next batch, by the first waiting
+    caller. Under concurrent load this turns N embedding calls into a few
+    batched ones. All requests go through the embedder's own keep-alive
+    session.
+
+    The embedder is thread-safe.
+    """
+
+    def __init__(
+        self,
+        model: str = EMBEDDING_MODEL,
+        api_url: str = OLLAMA_EMBED_API_URL,
+        max_batch_size: int = MAX_EMBED_BATCH_SIZE,
+        session: Optional[requests.Session] = None,
+    ):
+        """
+        Initialize the embedder.
+
+        Args:
+            model: Embedding model name
+            api_url: Ollama embeddings API URL
+            max_batch_size: Maximum number of texts per request
+            session: Optional HTTP session for the embeddings API
+                     (default: a new session owned by this embedder)
+        """
+        self.model = model
+        self.api_url = api_url
+        self.max_batch_size = max_batch_size
+        self.session = session or requests.Session()
+
+        self._lock = threading.Lock()
+        self._pending: List[_PendingEmbedding] = []
+        self._busy = False
+
+    def embed(self, text: str) -> List[float]:
+        """
+        Embed a single text.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector
+
+        Raises:
+            ConnectionError: If the Ollama API call fails
+        """
+        request = _PendingEmbedding(text)
+
+        with self._lock:
+            self._pending.append(request)
+            lead = not self._busy
+            self._busy = True
+
+        if not lead:
+            # Wait until our batch is done, or until we are asked to send it
+            request.done.wait()
+            if not request.lead:
+                return request.result()
+
+        self._send_next_batch()
+        return request.result()
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several texts in as few requests as possible.
+
+        The texts are already a batch, so they are sent directly instead of
+        queueing behind other callers, max_batch_size texts per request.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Embedding vectors, in the order of texts
+
+        Raises:
+            ConnectionError: If the Ollama API call fails
+        """
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), self.max_batch_size):
+            embeddings.extend(text_to_embeddings(
+                texts=texts[start:start + self.max_batch_size],
+                model=self.model,
+                api_url=self.api_url,
+                session=self.session
+            ))
+        return embeddings
+
+    def close(self) -> None:
+        """Close the embedder's pooled connections."""
+        self.session.close()
+
+    def _send_next_batch(self) -> None:
+        """Send the oldest pending texts and hand off to the next caller."""
+        with self._lock:
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+
+        try:
+            embeddings = text_to_embeddings(
+                texts=[request.text for request in batch],
+                model=self.model,
+                api_url=self.api_url,
+                session=self.session
+            )
+            for request, embedding in zip(batch, embeddings):
+                request.embedding = embedding
+        except Exception as e:
+            for request in batch:
+                request.error = e
+
+        for request in batch:
+            request.done.set()
+
+        with self._lock:
+            if self._pending:
+                # The first waiting caller sends the next batch
+                next_request = self._pending[0]
+                next_request.lead = True
+                next_request.done.set()
+            else:
+                self._busy = False
@@ -5,16 +5,15 @@ This module provides document retrieval functionality from ChromaDB
 using semantic similarity search.
 """
 
-import sys
-from pathlib import Path
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
 from typing import List, Dict, Any, Optional
 
-# Add project root to path to import from db and utils
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
+import numpy as np
 
 from db.chromadb_service import ChromaDBService
-from utils import text_to_embeddings
+from langgraph_service.rag.embedder import BatchingEmbedder
 from langgraph_service.config import (
     CHROMADB_PERSIST_DIRECTORY,
     COLLECTION_NAME,
@@ -23,8 +22,19 @@ from langgraph_service.config import (
     OLLAMA_TIMEOUT,
     RETRIEVAL_TOP_K,
     SIMILARITY_THRESHOLD,
+    EMBEDDING_CACHE_SIZE,
 )
 
+# Distance -> similarity scale per ChromaDB distance space, where
+# similarity = 1 - scale * distance. "cosine" and "ip" distances are
+# 1 - similarity; "l2" is the squared L2 distance, which for the unit-length
+# embeddings Ollama returns is 2 - 2 * cosine similarity
+_DISTANCE_SCALES = {"cosine": 1.0, "ip": 1.0, "l2": 0.5}
+
+# Reciprocal Rank Fusion constant: a document at rank r in one result
+# list contributes 1 / (RRF_K + r) to its fused score
+RRF_K = 60
+
 
 class ChromaDBRetriever:
     """
@@ -43,6 +53,7 @@ class ChromaDBRetriever:
         embedding_model: str = EMBEDDING_MODEL,
         embed_api_url: str = OLLAMA_EMBED_API_URL,
         timeout: int = OLLAMA_TIMEOUT,
+        embedding_cache_size: int = EMBEDDING_CACHE_SIZE,
     ):
         """
         Initialize the ChromaDB retriever.
@@ -53,24 +64,47 @@ class ChromaDBRetriever:
             embedding_model: Model name for generating embeddings
             embed_api_url: Ollama embeddings API URL
             timeout: Request timeout in seconds
+            embedding_cache_size: Number of query embeddings to keep (0 disables the cache)
         """
         self.collection_name = collection_name
         self.embedding_model = embedding_model
         self.embed_api_url = embed_api_url
         self.timeout = timeout
         
+        # Shared by all queries through this retriever, so concurrent
+        # queries are embedded in batched requests
+        self.embedder = BatchingEmbedder(
+            model=embedding_model,
+            api_url=embed_api_url
+        )
+        
+        # Exact-match cache of query -> embedding, kept in LRU order.
+        # Vectors are stored as float32 arrays: 4 bytes per element against
+        # about 32 for a list of Python floats (pointer plus float object).
+        # A hit returns the vector rounded to float32 (about 7 significant
+        # digits), which does not change similarity scores in practice
+        self.embedding_cache_size = embedding_cache_size
+        self._embedding_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._embedding_cache_lock = threading.Lock()
+        
         # Initialize ChromaDB service
         self.chromadb_service = ChromaDBService(
             collection_name=collection_name,
             persist_directory=persist_directory,
             create_collection=True
         )
+        
+        # Read the collection's distance space once (ChromaDB defaults to l2)
+        collection_metadata = self.chromadb_service.collection.metadata or {}
+        self.distance_space = collection_metadata.get("hnsw:space", "l2")
+        self._distance_scale = _DISTANCE_SCALES.get(self.distance_space, 1.0)
     
     def retrieve_relevant_docs(
         self,
         query: str,
         top_k: int = RETRIEVAL_TOP_K,
         similarity_threshold: float = SIMILARITY_THRESHOLD,
+        query_embedding: Optional[List[float]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Retrieve relevant documents for a given query.
@@ -79,6 +113,8 @@ class ChromaDBRetriever:
             query: The user's query string
             top_k: Number of documents to retrieve (default from config)
             similarity_threshold: Minimum similarity score (0.0 to 1.0)
+            query_embedding: Precomputed embedding of the query (e.g. from the
+                           semantic cache lookup); computed here if not given
             
         Returns:
             List of dictionaries, each containing:
@@ -94,8 +130,9 @@ class ChromaDBRetriever:
         if not query or not query.strip():
             raise ValueError("Query cannot be empty")
         
-        # Convert query to embedding
-        query_embedding = self._query_to_embedding(query)
+        # Convert query to embedding (unless the caller already did)
+        if query_embedding is None:
+            query_embedding = self._query_to_embedding(query)
         
         # Search ChromaDB
         results = self.chromadb_service.read(
@@ -111,6 +148,88 @@ class ChromaDBRetriever:
         
         return formatted_results
     
+    def retrieve_for_queries(
+        self,
+        queries: List[str],
+        top_k: int = RETRIEVAL_TOP_K,
+        similarity_threshold: float = SIMILARITY_THRESHOLD,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve documents for several phrasings of the same question.
+        
+        All queries are embedded in one request and searched in one ChromaDB
+        query. The per-query result lists are merged with Reciprocal Rank
+        Fusion, so documents ranked highly for several phrasings come first.
+        
+        Args:
+            queries: Query strings (e.g. the original query and rewrites of it)
+            top_k: Number of documents to return (default from config)
+            similarity_threshold: Minimum similarity score (0.0 to 1.0)
+            query_embedding: Precomputed embedding of the first query; only
+                           the remaining queries are embedded if given
+            
+        Returns:
+            List of document dictionaries as returned by retrieve_relevant_docs,
+            each with its best similarity score, in fused rank order
+            
+        Raises:
+            ValueError: If the first query is empty
+            ConnectionError: If Ollama API is unavailable
+        """
+        if not queries or not queries[0] or not queries[0].strip():
+            raise ValueError("Query cannot be empty")
+        
+        # Drop blank and repeated phrasings; the first query stays first
+        queries = list(dict.fromkeys(
+            query for query in queries if query and query.strip()
+        ))
+        
+        if query_embedding is None:
+            embeddings = self._queries_to_embeddings(queries)
+        else:
+            embeddings = [query_embedding] + self._queries_to_embeddings(queries[1:])
+        
+        results = self.chromadb_service.read(
+            query_embeddings=embeddings,
+            n_results=top_k
+        )
+        
+        fused: Dict[str, float] = {}
+        best: Dict[str, Dict[str, Any]] = {}
+        for index in range(len(queries)):
+            ranked = self._format_results(
+                results,
+                similarity_threshold=similarity_threshold,
+                query_index=index
+            )
+            for rank, doc in enumerate(ranked, 1):
+                doc_id = doc["id"]
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (RRF_K + rank)
+                if doc_id not in best or doc["score"] > best[doc_id]["score"]:
+                    best[doc_id] = doc
+        
+        ranked_ids = sorted(fused, key=fused.get, reverse=True)[:top_k]
+        return [best[doc_id] for doc_id in ranked_ids]
+    
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Convert a query string to an embedding vector.
+        
+        Uses the same embedding model as retrieval, so the vector can be
+        compared with other query embeddings (e.g. by the semantic cache).
+        
+        Args:
+            query: The query string
+            
+        Returns:
+            List of floats representing the embedding vector
+            
+        Raises:
+            ConnectionError: If Ollama API is unavailable
+        """
+        return self._query_to_embedding(query)
+    
     def _query_to_embedding(self, query: str) -> List[float]:
         """
         Convert a query string to an embedding vector.
@@ -124,28 +243,99 @@ class ChromaDBRetriever:
         Raises:
             ConnectionError: If Ollama API is unavailable
         """
+        # Repeated queries skip the Ollama round-trip
+        cache_key = self._embedding_cache_key(query)
+        with self._embedding_cache_lock:
+            cached = self._embedding_cache.get(cache_key)
+            if cached is not None:
+                self._embedding_cache.move_to_end(cache_key)
+        if cached is not None:
+            return cached.tolist()
+        
         try:
-            embeddings = text_to_embeddings(
-                texts=[query],
-                model=self.embedding_model,
-                api_url=self.embed_api_url
-            )
+            embedding = self.embedder.embed(query)
             
-            if not embeddings or len(embeddings) == 0:
+            if not embedding:
                 raise ConnectionError("No embeddings returned from Ollama API")
             
-            return embeddings[0]
-            
         except Exception as e:
             raise ConnectionError(
                 f"Failed to generate embedding for query: {e}. "
                 f"Please ensure Ollama is running and the model '{self.embedding_model}' is available."
             )
+        
+        if self.embedding_cache_size > 0:
+            with self._embedding_cache_lock:
+                self._embedding_cache[cache_key] = np.asarray(embedding, dtype=np.float32)
+                if len(self._embedding_cache) > self.embedding_cache_size:
+                    self._embedding_cache.popitem(last=False)
+        
+        return embedding
+    
+    def _queries_to_embeddings(self, queries: List[str]) -> List[List[float]]:
+        """
+        Convert several query strings to embedding vectors.
+        
+        Queries found in the embedding cache are not sent again; the rest
+        are embedded together in one batched request.
+        
+        Args:
+            queries: The query strings
+            
+        Returns:
+            Embedding vectors, in the order of queries
+            
+        Raises:
+            ConnectionError: If Ollama API is unavailable
+        """
+        embeddings: List[Optional[List[float]]] = [None] * len(queries)
+        cache_keys = [self._embedding_cache_key(query) for query in queries]
+        
+        with self._embedding_cache_lock:
+            for i, cache_key in enumerate(cache_keys):
+                cached = self._embedding_cache.get(cache_key)
+                if cached is not None:
+                    self._embedding_cache.move_to_end(cache_key)
+                    embeddings[i] = cached.tolist()
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
+        
+        try:
+            new_embeddings = self.embedder.embed_many([queries[i] for i in missing])
+            
+            if len(new_embeddings) != len(missing) or not all(new_embeddings):
+                raise ConnectionError("No embeddings returned from Ollama API")
+            
+        except Exception as e:
+            raise ConnectionError(
+                f"Failed to generate embeddings for queries: {e}. "
+                f"Please ensure Ollama is running and the model '{self.embedding_model}' is available."
+            )
+        
+        for i, embedding in zip(missing, new_embeddings):
+            embeddings[i] = embedding
+        
+        if self.embedding_cache_size > 0:
+            with self._embedding_cache_lock:
+                for i, embedding in zip(missing, new_embeddings):
+                    self._embedding_cache[cache_keys[i]] = np.asarray(embedding, dtype=np.float32)
+                while len(self._embedding_cache) > self.embedding_cache_size:
+                    self._embedding_cache.popitem(last=False)
+        
+        return embeddings
+    
+    def _embedding_cache_key(self, query: str) -> bytes:
+        """Build the embedding cache key for a model and stripped query."""
+        key = f"{self.embedding_model}\x00{query.strip()}"
+        return blake2b(key.encode("utf-8"), digest_size=16).digest()
     
     def _format_results(
         self,
         results: Dict[str, Any],
-        similarity_threshold: float = SIMILARITY_THRESHOLD
+        similarity_threshold: float = SIMILARITY_THRESHOLD,
+        query_index: int = 0,
     ) -> List[Dict[str, Any]]:
         """
         Format ChromaDB query results into a standardized format.
@@ -153,6 +343,7 @@ class ChromaDBRetriever:
         Args:
             results: Raw results from ChromaDB query
             similarity_threshold: Minimum similarity score to include
+            query_index: Which query's results to format, for multi-query searches
             
         Returns:
             List of formatted document dictionaries
@@ -160,51 +351,39 @@ class ChromaDBRetriever:
         formatted = []
         
         # Check if results are empty
-        if not results or not results.get("ids") or len(results["ids"]) == 0:
+        if not results or not results.get("ids") or not results["ids"][query_index]:
             return formatted
         
-        # Extract data from results
-        ids = results.get("ids", [])
-        documents = results.get("documents", [])
-        distances = results.get("distances", [])
-        metadatas = results.get("metadatas", [])
-        
-        # ChromaDB returns lists of lists (one list per query)
-        # Since we query with one embedding, we get the first list
-        if ids and isinstance(ids[0], list):
-            ids = ids[0]
-            documents = documents[0] if documents else []
-            distances = distances[0] if distances else []
-            metadatas = metadatas[0] if metadatas else []
-        
-        # Format each result
-        for i in range(len(ids)):
-            # Convert distance to similarity score
-            # ChromaDB uses cosine distance (0 = identical, 1 = opposite)
-            # We convert to similarity (1 = identical, 0 = opposite)
-            distance = distances[i] if i < len(distances) else 1.0
-            similarity_score = 1.0 - distance
-            
-            # Filter by similarity threshold
-            if similarity_score < similarity_threshold:
-                continue
-            
-            # Build result dictionary
+        # ChromaDB returns lists of lists (one list per query); each column
+        # is read once, then indexed by query
+        ids = results["ids"][query_index]
+        documents = results.get("documents")
+        distances = results.get("distances")
+        metadatas = results.get("metadatas")
+        documents = documents[query_index] if documents else [""] * len(ids)
+        distances = distances[query_index] if distances else [1.0] * len(ids)
+        metadatas = metadatas[query_index] if metadatas else [None] * len(ids)
+        
+        # Filter on distance, so only the survivors are converted to scores
+        # (similarity = 1 - scale * distance for the collection's space)
+        distances = np.asarray(distances, dtype=np.float64)
+        max_distance = (1.0 - similarity_threshold) / self._distance_scale
+        
+        # ChromaDB returns nearest first, so the documents that pass the
+        # threshold are already sorted by score (highest first)
+        for i in np.flatnonzero(distances <= max_distance).tolist():
             result_dict = {
-                "text": documents[i] if i < len(documents) else "",
-                "score": similarity_score,
-                "id": ids[i] if i < len(ids) else None,
+                "text": documents[i] or "",
+                "score": 1.0 - self._distance_scale * float(distances[i]),
+                "id": ids[i],
             }
             
             # Add metadata if available
-            if metadatas and i < len(metadatas) and metadatas[i]:
+            if metadatas[i]:
                 result_dict["metadata"] = metadatas[i]
             
             formatted.append(result_dict)
         
-        # Sort by score (highest first)
-        formatted.sort(key=lambda x: x["score"], reverse=True)
-        
         return formatted
     
     def get_collection_info(self) -> Dict[str, Any]:
@@ -2,9 +2,16 @@
 Service module for LangGraph RAG service.
 
 This module provides high-level service interfaces for using the RAG system.
-"""
 
-from langgraph_service.service.rag_service import RAGService
+RAGService is imported lazily on first access, so importing this package
+does not pull in LangGraph, ChromaDB, and the Ollama clients.
+"""
 
 __all__ = ["RAGService"]
 
+
+def __getattr__(name):
+    if name == "RAGService":
+        from langgraph_service.service.rag_service import RAGService
+        return RAGService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,8 +6,21 @@ It wraps the LangGraph and manages conversation history, state initialization,
 and provides both synchronous and streaming interfaces.
 """
 
-from typing import List, Dict, Any, Optional, Iterator
+import threading
+import time
+from collections import OrderedDict, deque
+from hashlib import blake2b
+from typing import Deque, List, Dict, Any, Optional, Iterable, Iterator, Tuple
+from langgraph_service.config import (
+    MAX_HISTORY_LENGTH,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL,
+    ENABLE_WARMUP,
+    WARMUP_REFRESH_INTERVAL,
+)
+from langgraph_service.shared import shared_instance
 from langgraph_service.graph.graph import RAGGraph
+from langgraph_service.graph.nodes import get_retriever, get_llm_client
 from langgraph_service.graph.state import (
     GraphState,
     create_initial_state,
@@ -15,6 +28,75 @@ from langgraph_service.graph.state import (
 )
 
 
+@shared_instance
+def _get_default_graph() -> RAGGraph:
+    """Get the RAGGraph shared by services created without their own graph."""
+    return RAGGraph()
+
+
+def _warm_up_backends() -> None:
+    """
+    Prime the retrieval and generation backends.
+    
+    Runs one tiny ChromaDB search (which also loads the embedding model)
+    and a one-token chat request that loads the chat model into Ollama's
+    memory. Failures are ignored: warm-up is best effort, and a real
+    query will surface any connection problem to the user.
+    """
+    try:
+        get_retriever().retrieve_relevant_docs(
+            query="warmup",
+            top_k=1,
+            similarity_threshold=0.0
+        )
+    except Exception:
+        pass
+    
+    try:
+        get_llm_client().warmup()
+    except Exception:
+        pass
+
+
+def _warmup_loop() -> None:
+    """Warm up once, then again every WARMUP_REFRESH_INTERVAL seconds (if set)."""
+    _warm_up_backends()
+    while WARMUP_REFRESH_INTERVAL > 0:
+        time.sleep(WARMUP_REFRESH_INTERVAL)
+        # Only the chat model is re-requested; it is the one Ollama unloads
+        try:
+            get_llm_client().warmup()
+        except Exception:
+            pass
+
+
+@shared_instance
+def _start_warmup() -> threading.Thread:
+    """Start the background warm-up thread (once per process)."""
+    thread = threading.Thread(target=_warmup_loop, name="rag-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _response_cache_key(
+    query: str,
+    system_prompt: Optional[str],
+    history: Iterable[Dict[str, str]]
+) -> bytes:
+    """
+    Build the exact-match cache key for a normalized query.
+    
+    The system prompt and the conversation history are part of the key,
+    so a follow-up (e.g. "and for business accounts?") is only answered
+    from the cache within the same conversation context.
+    """
+    key = blake2b(digest_size=16)
+    key.update(f"{query.strip().lower()}\x00{system_prompt or ''}".encode("utf-8"))
+    for message in history:
+        key.update(f"\x00{message.get('role', '')}\x00{message.get('content', '')}".encode("utf-8"))
+    return key.digest()
+
+
 class RAGService:
     """
     High-level service interface for the RAG system.
@@ -40,17 +122,50 @@ class RAGService:
         ```
     """
     
-    def __init__(self, enable_history: bool = True):
+    def __init__(
+        self,
+        enable_history: bool = True,
+        warmup: bool = ENABLE_WARMUP,
+        graph: Optional[RAGGraph] = None
+    ):
         """
         Initialize the RAG service.
         
+        The graph holds no per-conversation state, so services share one
+        RAGGraph unless a graph is passed in; each service keeps its own
+        conversation history and response cache.
+        
         Args:
             enable_history: Whether to maintain conversation history.
                           If True, previous messages are included in context.
+                          Only the last MAX_HISTORY_LENGTH messages are kept.
+            warmup: Whether to warm up ChromaDB and Ollama in a background
+                   thread so the first query does not pay the cold-start cost.
+                   The backends are shared, so this runs once per process.
+            graph: Optional RAGGraph to use instead of the shared one
         """
-        self.graph = RAGGraph()
+        self.graph = graph or _get_default_graph()
         self.enable_history = enable_history
-        self.conversation_history: List[Dict[str, str]] = []
+        self.conversation_history: Deque[Dict[str, str]] = deque(maxlen=MAX_HISTORY_LENGTH)
+        
+        # Exact-match cache of query -> (response, time cached), kept in LRU order
+        self._response_cache: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+        
+        # Guards the history and response cache: a server may run several
+        # chats on one service at once (graph runs themselves are not locked)
+        self._lock = threading.Lock()
+        
+        if warmup:
+            _start_warmup()
+    
+    def warmup(self) -> None:
+        """
+        Prime the retrieval and generation backends now, in this thread.
+        
+        Failures are ignored: warm-up is best effort, and a real query will
+        surface any connection problem to the user.
+        """
+        _warm_up_backends()
     
     def chat(
         self,
@@ -63,6 +178,9 @@ class RAGService:
         
         This is the main method for interacting with the RAG system.
         It handles state initialization, graph execution, and response extraction.
+        Repeated queries (same text after strip/lower, same system prompt and
+        conversation history) are answered from an in-memory cache without
+        running the graph, for up to RESPONSE_CACHE_TTL seconds.
         
         Args:
             query: The user's query string
@@ -79,38 +197,140 @@ class RAGService:
             print(response)
             ```
         """
-        if reset_history:
-            self.conversation_history = []
+        cache_key, cached_response, state = self._start_chat(query, reset_history, system_prompt)
+        if cached_response is not None:
+            return cached_response
         
-        # Create initial state
-        state = create_initial_state(query)
+        # Execute the graph
+        try:
+            final_state = self.graph.invoke(state)
+        except Exception as e:
+            return self._fail_chat(query, e)
         
-        # Add conversation history if enabled
-        if self.enable_history and self.conversation_history:
-            state["messages"] = self.conversation_history.copy()
+        return self._finish_chat(query, cache_key, final_state)
+    
+    async def achat(
+        self,
+        query: str,
+        reset_history: bool = False,
+        system_prompt: Optional[str] = None
+    ) -> str:
+        """
+        Process a user query and return a response, without blocking the event loop.
+        
+        Same behavior as chat(). The graph runs through its async interface,
+        so an async server (e.g. the FastAPI app) can serve other requests
+        while this one waits on ChromaDB and the LLM.
         
-        # Add system prompt if provided
-        if system_prompt:
-            state["metadata"]["system_prompt"] = system_prompt
+        Args:
+            query: The user's query string
+            reset_history: If True, clears conversation history before processing
+            system_prompt: Optional system prompt to override default behavior
+            
+        Returns:
+            The generated response string
+            
+        Example:
+            ```python
+            service = RAGService()
+            response = await service.achat("What is my daily transaction limit?")
+            ```
+        """
+        cache_key, cached_response, state = self._start_chat(query, reset_history, system_prompt)
+        if cached_response is not None:
+            return cached_response
         
         # Execute the graph
         try:
-            final_state = self.graph.invoke(state)
+            final_state = await self.graph.ainvoke(state)
         except Exception as e:
-            # Return error message
-            error_msg = f"I encountered an error while processing your query: {str(e)}"
-            if self.enable_history:
+            return self._fail_chat(query, e)
+        
+        return self._finish_chat(query, cache_key, final_state)
+    
+    def _start_chat(
+        self,
+        query: str,
+        reset_history: bool,
+        system_prompt: Optional[str]
+    ) -> Tuple[bytes, Optional[str], Optional[GraphState]]:
+        """
+        Prepare a chat turn.
+        
+        Returns:
+            Tuple of (cache key, cached response or None, initial state or None);
+            exactly one of the cached response and the state is set
+        """
+        with self._lock:
+            if reset_history:
+                self.conversation_history.clear()
+            
+            # Serve exact repeats from the response cache
+            history = self.conversation_history if self.enable_history else ()
+            cache_key = _response_cache_key(query, system_prompt, history)
+            cached = self._response_cache.get(cache_key)
+            if (
+                cached is not None
+                and RESPONSE_CACHE_TTL > 0
+                and time.monotonic() - cached[1] > RESPONSE_CACHE_TTL
+            ):
+                # Expired (the knowledge base may have changed since)
+                del self._response_cache[cache_key]
+                cached = None
+            if not reset_history and cached is not None:
+                self._response_cache.move_to_end(cache_key)
+                response = cached[0]
+                if self.enable_history:
+                    self.conversation_history.append({"role": "user", "content": query})
+                    self.conversation_history.append({"role": "assistant", "content": response})
+                return cache_key, response, None
+            
+            # Create initial state
+            state = create_initial_state(query)
+            
+            # Add conversation history if enabled
+            if self.enable_history and self.conversation_history:
+                state["messages"] = list(self.conversation_history)
+            
+            # Add system prompt if provided
+            if system_prompt:
+                state["metadata"]["system_prompt"] = system_prompt
+        
+            return cache_key, None, state
+    
+    def _fail_chat(self, query: str, error: Exception) -> str:
+        """Record and return the error message for a failed graph run."""
+        error_msg = f"I encountered an error while processing your query: {str(error)}"
+        if self.enable_history:
+            with self._lock:
                 self.conversation_history.append({"role": "user", "content": query})
                 self.conversation_history.append({"role": "assistant", "content": error_msg})
-            return error_msg
-        
+        return error_msg
+    
+    def _finish_chat(self, query: str, cache_key: bytes, final_state: Dict[str, Any]) -> str:
+        """Cache the response of a finished graph run and record it in the history."""
         # Extract response
         response = final_state.get("response", "")
+        metadata = final_state.get("metadata", {})
         
-        # Update conversation history
-        if self.enable_history:
-            self.conversation_history.append({"role": "user", "content": query})
-            self.conversation_history.append({"role": "assistant", "content": response})
+        with self._lock:
+            # Cache successful responses (nodes report failures via metadata)
+            if (
+                RESPONSE_CACHE_SIZE > 0
+                and response
+                and "generation_error" not in metadata
+                and "retrieval_error" not in metadata
+            ):
+                self._response_cache[cache_key] = (response, time.monotonic())
+                self._response_cache.move_to_end(cache_key)
+                if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+                    self._response_cache.popitem(last=False)
+        
+            # Update conversation history (a failed generation's error message is
+            # returned to the caller but not replayed to the LLM as an answer)
+            if self.enable_history and "generation_error" not in metadata:
+                self.conversation_history.append({"role": "user", "content": query})
+                self.conversation_history.append({"role": "assistant", "content": response})
         
         return response
     
@@ -124,7 +344,10 @@ class RAGService:
         Process a user query and stream intermediate results.
         
         This method yields state updates after each node execution,
-        allowing you to see the progress of the RAG pipeline.
+        allowing you to see the progress of the RAG pipeline. While the
+        LLM generates, each text chunk is yielded as soon as it arrives,
+        as {"response_delta": chunk}. Exact repeats are answered from the
+        response cache as a single {"response_cache": {"response": ...}}.
         
         Args:
             query: The user's query string
@@ -132,51 +355,100 @@ class RAGService:
             system_prompt: Optional system prompt to override default behavior
             
         Yields:
-            Dictionary with node name and state update
+            Dictionary with node name and state update, or with
+            "response_delta" and a generated text chunk
             
         Example:
             ```python
             service = RAGService()
             for update in service.stream("What is my daily transaction limit?"):
+                if "response_delta" in update:
+                    print(update["response_delta"], end="", flush=True)
+                    continue
                 node_name = list(update.keys())[0]
                 print(f"Node: {node_name}")
                 print(f"State: {update[node_name]}")
             ```
         """
-        if reset_history:
-            self.conversation_history = []
+        cache_key, cached_response, state = self._start_chat(query, reset_history, system_prompt)
+        if cached_response is not None:
+            yield {"response_cache": {"response": cached_response}}
+            return
         
-        # Create initial state
-        state = create_initial_state(query)
+        # Stream graph execution; the "values" mode only tracks the final state
+        final_state: Dict[str, Any] = {}
+        try:
+            for mode, chunk in self.graph.stream(state, stream_mode=["updates", "custom", "values"]):
+                if mode == "values":
+                    final_state = chunk
+                else:
+                    yield chunk
+        except Exception as e:
+            error_msg = self._fail_chat(query, e)
+            yield {"error": {"error": str(e), "message": error_msg}}
+            return
         
-        # Add conversation history if enabled
-        if self.enable_history and self.conversation_history:
-            state["messages"] = self.conversation_history.copy()
+        self._finish_chat(query, cache_key, final_state)
+    
+    def stream_response(
+        self,
+        query: str,
+        reset_history: bool = False,
+        system_prompt: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Process a user query and yield the response text as it is generated.
         
-        # Add system prompt if provided
-        if system_prompt:
-            state["metadata"]["system_prompt"] = system_prompt
+        LLM tokens are yielded as soon as Ollama produces them. Responses that
+        are not generated token by token (cache hits, unclear queries) are
+        yielded as a single chunk. Responses are cached and recorded in the
+        history the same way as chat().
+        
+        Args:
+            query: The user's query string
+            reset_history: If True, clears conversation history before processing
+            system_prompt: Optional system prompt to override default behavior
+            
+        Yields:
+            Response text chunks, in order
+            
+        Example:
+            ```python
+            service = RAGService()
+            for chunk in service.stream_response("What is my daily transaction limit?"):
+                print(chunk, end="", flush=True)
+            ```
+        """
+        cache_key, cached_response, state = self._start_chat(query, reset_history, system_prompt)
+        if cached_response is not None:
+            yield cached_response
+            return
+        
+        streamed = False
+        final_state: Dict[str, Any] = {}
         
-        # Stream graph execution
         try:
-            for state_update in self.graph.stream(state):
-                yield state_update
-                
-                # Extract final state from last update
-                if isinstance(state_update, dict):
-                    for node_name, node_state in state_update.items():
-                        if node_name == "respond":
-                            # This is the final node
-                            response = node_state.get("response", "")
-                            if self.enable_history and response:
-                                self.conversation_history.append({"role": "user", "content": query})
-                                self.conversation_history.append({"role": "assistant", "content": response})
+            for mode, chunk in self.graph.stream(state, stream_mode=["custom", "values"]):
+                if mode == "values":
+                    final_state = chunk
+                elif isinstance(chunk, dict) and chunk.get("response_delta"):
+                    streamed = True
+                    yield chunk["response_delta"]
         except Exception as e:
-            error_msg = f"I encountered an error while processing your query: {str(e)}"
-            yield {"error": {"error": str(e), "message": error_msg}}
-            if self.enable_history:
-                self.conversation_history.append({"role": "user", "content": query})
-                self.conversation_history.append({"role": "assistant", "content": error_msg})
+            yield self._fail_chat(query, e)
+            return
+        
+        response = final_state.get("response", "")
+        metadata = final_state.get("metadata", {})
+        
+        if not streamed:
+            if response:
+                yield response
+        elif "generation_error" in metadata:
+            # Generation failed part-way; the node replaced the response with the error
+            yield f"\n\n{response}"
+        
+        self._finish_chat(query, cache_key, final_state)
     
     def get_history(self) -> List[Dict[str, str]]:
         """
@@ -185,11 +457,18 @@ class RAGService:
         Returns:
             List of message dictionaries with 'role' and 'content' keys
         """
-        return self.conversation_history.copy()
+        with self._lock:
+            return list(self.conversation_history)
     
     def clear_history(self):
         """Clear the conversation history."""
-        self.conversation_history = []
+        with self._lock:
+            self.conversation_history.clear()
+    
+    def clear_cache(self):
+        """Clear the exact-match response cache."""
+        with self._lock:
+            self._response_cache.clear()
     
     def get_state_dict(self, query: str) -> Dict[str, Any]:
         """
@@ -205,7 +484,7 @@ class RAGService:
         """
         state = create_initial_state(query)
         if self.enable_history and self.conversation_history:
-            state["messages"] = self.conversation_history.copy()
+            state["messages"] = self.get_history()
         return state_to_dict(state)
     
     def invoke_with_state(self, state: GraphState) -> GraphState:
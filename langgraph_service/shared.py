@@ -0,0 +1,37 @@
+"""
+Shared Instances
+
+This module provides the decorator used for the process-wide instances
+(classifier, retriever, chat clients, compiled graph) that are built on
+first use and then shared by every caller.
+"""
+
+import threading
+from functools import wraps
+from typing import Callable, TypeVar
+
+_T = TypeVar("_T")
+
+
+def shared_instance(factory: Callable[[], _T]) -> Callable[[], _T]:
+    """
+    Make factory build its instance once and return it on every call.
+    
+    Unlike lru_cache, a lock makes concurrent first calls (e.g. the first
+    requests to a threaded server) wait for one instance instead of each
+    opening their own connections. Later calls skip the lock. If factory
+    raises, nothing is stored and the next call tries again.
+    """
+    lock = threading.Lock()
+    instance = None
+    
+    @wraps(factory)
+    def get() -> _T:
+        nonlocal instance
+        if instance is None:
+            with lock:
+                if instance is None:
+                    instance = factory()
+        return instance
+    
+    return get
@@ -12,24 +12,81 @@ This is useful for:
 - Learning before moving to LangGraph
 """
 
-from typing import Dict, Any, List, Optional
-from langgraph_service.graph.query_classifier import QueryClassifier, QueryType
-from langgraph_service.rag.retriever import ChromaDBRetriever
-from langgraph_service.llm.ollama_chat import OllamaChatClient
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+from langgraph_service.graph.query_classifier import QueryType
+from langgraph_service.graph.nodes import (
+    get_classifier,
+    get_retriever,
+    get_llm_client,
+    get_semantic_cache,
+    RAG_SYSTEM_PROMPT,
+    RAG_USER_TEMPLATE,
+    DIRECT_SYSTEM_PROMPT,
+)
+from langgraph_service.llm.tokenizer import truncate_to_token_budget
 from langgraph_service.config import (
     RETRIEVAL_TOP_K,
     SIMILARITY_THRESHOLD,
     MAX_CONTEXT_LENGTH,
+    MAX_CONTEXT_TOKENS,
+    ENABLE_SEMANTIC_CACHE,
+)
+
+
+# Canned replies for greetings, checked in order against the lowercased query
+_GREETING_REPLIES = (
+    ("hello", "Hello! How can I help you today?"),
+    ("hi", "Hi there! What can I do for you?"),
+    ("thanks", "You're welcome! Is there anything else I can help with?"),
+    ("bye", "Goodbye! Have a great day!"),
 )
+_DEFAULT_GREETING_REPLY = "Hello! How can I help you today?"
+
+
+# The classifier, retriever and chat client (Ollama or vLLM, per
+# LLM_BACKEND) are the graph's shared instances. None of them hold
+# per-query state.
+
+def _lookup_cached_response(query: str) -> Tuple[Optional[List[float]], Optional[str]]:
+    """
+    Look up a query in the semantic response cache shared with the graph.
+    
+    Returns:
+        Tuple of (query_embedding, cached_response). The embedding is None
+        if the cache is disabled or the query could not be embedded; the
+        response is None on a miss.
+    """
+    if not ENABLE_SEMANTIC_CACHE:
+        return None, None
+    
+    try:
+        query_embedding = get_retriever().embed_query(query)
+    except Exception:
+        # Treat as a miss; retrieval will report the connection problem
+        return None, None
+    
+    return query_embedding, get_semantic_cache().lookup(query_embedding)
+
 
+def _cache_response(query_embedding: Optional[List[float]], response: str) -> None:
+    """Store a generated response in the semantic cache under the query embedding."""
+    if query_embedding is not None and response:
+        get_semantic_cache().put(query_embedding, response)
 
-def format_context(documents: List[Dict[str, Any]], max_length: int = MAX_CONTEXT_LENGTH) -> str:
+
+def format_context(
+    documents: List[Dict[str, Any]],
+    max_length: int = MAX_CONTEXT_LENGTH,
+    max_tokens: int = MAX_CONTEXT_TOKENS,
+) -> str:
     """
     Format retrieved documents into a context string for the LLM.
     
     Args:
         documents: List of document dictionaries with 'text', 'score', etc.
-        max_length: Maximum length of the formatted context
+        max_length: Maximum length of the formatted context (in characters)
+        max_tokens: Maximum length of the formatted context (in tokens)
         
     Returns:
         Formatted context string
@@ -42,24 +99,28 @@ def format_context(documents: List[Dict[str, Any]], max_length: int = MAX_CONTEX
     
     for i, doc in enumerate(documents, 1):
         text = doc.get("text", "")
-        score = doc.get("score", 0)
         
         # Format: "Document 1 (relevance: 0.85): ..."
-        doc_text = f"Document {i} (relevance: {score:.2f}): {text}"
+        # The header is formatted once and reused if the text gets truncated
+        header = f"Document {i} (relevance: {doc.get('score', 0):.2f}): "
         
         # Check if adding this document would exceed max length
-        if current_length + len(doc_text) > max_length:
+        # (sized before concatenating, so rejected text is never copied)
+        if current_length + len(header) + len(text) > max_length:
             # Truncate this document if needed
             remaining = max_length - current_length - 50  # Reserve space for formatting
             if remaining > 0:
-                doc_text = f"Document {i} (relevance: {score:.2f}): {text[:remaining]}..."
+                doc_text = header + text[:remaining] + "..."
             else:
                 break
+        else:
+            doc_text = header + text
         
         context_parts.append(doc_text)
         current_length += len(doc_text)
     
-    return "\n\n".join(context_parts)
+    # Enforce the token budget to bound prompt prefill cost
+    return "\n\n".join(truncate_to_token_budget(context_parts, max_tokens))
 
 
 def create_rag_prompt(query: str, context: str) -> List[Dict[str, str]]:
@@ -73,23 +134,9 @@ def create_rag_prompt(query: str, context: str) -> List[Dict[str, str]]:
     Returns:
         List of messages for the LLM
     """
-    system_prompt = (
-        "You are a helpful customer support assistant. "
-        "Use the provided context from the knowledge base to answer questions accurately. "
-        "If the context doesn't contain relevant information, say so. "
-        "Be concise and helpful."
-    )
-    
-    user_message = f"""Context from knowledge base:
-{context}
-
-Question: {query}
-
-Please provide a helpful answer based on the context above."""
-    
     return [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_message}
+        {"role": "system", "content": RAG_SYSTEM_PROMPT},
+        {"role": "user", "content": RAG_USER_TEMPLATE.format(context=context, query=query)}
     ]
 
 
@@ -103,13 +150,8 @@ def create_direct_answer_prompt(query: str) -> List[Dict[str, str]]:
     Returns:
         List of messages for the LLM
     """
-    system_prompt = (
-        "You are a helpful assistant. "
-        "Answer questions directly and helpfully."
-    )
-    
     return [
-        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": DIRECT_SYSTEM_PROMPT},
         {"role": "user", "content": query}
     ]
 
@@ -124,9 +166,10 @@ def process_query(
     
     This is the main function that combines all components:
     1. Classify query
-    2. Retrieve documents (if RAG needed)
-    3. Format context
-    4. Generate response
+    2. Check the semantic cache (RAG and direct-answer queries)
+    3. Retrieve documents (if RAG needed)
+    4. Format context
+    5. Generate response
     
     Args:
         query: The user's query string
@@ -153,7 +196,7 @@ def process_query(
         }
     
     # Step 1: Classify query
-    classifier = QueryClassifier()
+    classifier = get_classifier()
     query_type, confidence, classification_metadata = classifier.classify_query(query)
     
     metadata = {
@@ -164,20 +207,12 @@ def process_query(
     
     # Step 2: Route based on classification
     if query_type == QueryType.GREETING:
-        # Simple greeting response
-        greeting_responses = {
-            "hello": "Hello! How can I help you today?",
-            "hi": "Hi there! What can I do for you?",
-            "thanks": "You're welcome! Is there anything else I can help with?",
-            "bye": "Goodbye! Have a great day!",
-        }
-        
+        # Simple greeting response (first matching keyword wins)
         query_lower = query.lower()
-        response = "Hello! How can I help you today?"
-        for greeting, reply in greeting_responses.items():
-            if greeting in query_lower:
-                response = reply
-                break
+        response = next(
+            (reply for greeting, reply in _GREETING_REPLIES if greeting in query_lower),
+            _DEFAULT_GREETING_REPLY
+        )
         
         return {
             "response": response,
@@ -197,16 +232,35 @@ def process_query(
             "metadata": metadata
         }
     
-    elif query_type == QueryType.RAG_REQUIRED:
+    # Similar queries answered before skip retrieval and generation
+    query_embedding, cached_response = _lookup_cached_response(query)
+    if cached_response is not None:
+        return {
+            "response": cached_response,
+            "query_type": query_type.value,
+            "retrieved_docs": [],
+            "context": "",
+            "metadata": {
+                **metadata,
+                "semantic_cache_hit": True
+            }
+        }
+    
+    retrieved_docs = []
+    context = ""
+    context_metadata = {}
+    
+    if query_type == QueryType.RAG_REQUIRED:
         # RAG path: Retrieve → Format → Generate
         
-        # Step 2a: Retrieve documents
-        retriever = ChromaDBRetriever()
+        # Step 2a: Retrieve documents (reusing the cache lookup's embedding)
+        retriever = get_retriever()
         try:
             retrieved_docs = retriever.retrieve_relevant_docs(
                 query=query,
                 top_k=top_k,
-                similarity_threshold=similarity_threshold
+                similarity_threshold=similarity_threshold,
+                query_embedding=query_embedding
             )
         except Exception as e:
             return {
@@ -222,62 +276,33 @@ def process_query(
         
         # Step 2b: Format context
         context = format_context(retrieved_docs, max_length=MAX_CONTEXT_LENGTH)
-        
-        # Step 2c: Generate response with context
-        llm_client = OllamaChatClient()
-        try:
-            messages = create_rag_prompt(query, context)
-            response = llm_client.generate_response(messages)
-        except Exception as e:
-            return {
-                "response": f"I encountered an error while generating a response: {str(e)}",
-                "query_type": query_type.value,
-                "retrieved_docs": retrieved_docs,
-                "context": context,
-                "metadata": {
-                    **metadata,
-                    "error": str(e)
-                }
-            }
-        
-        return {
-            "response": response,
-            "query_type": query_type.value,
-            "retrieved_docs": retrieved_docs,
-            "context": context,
-            "metadata": {
-                **metadata,
-                "docs_retrieved": len(retrieved_docs),
-                "context_length": len(context)
-            }
+        messages = create_rag_prompt(query, context)
+        context_metadata = {
+            "docs_retrieved": len(retrieved_docs),
+            "context_length": len(context)
         }
     
     else:  # DIRECT_ANSWER
         # Direct answer path: Generate without retrieval
-        
-        llm_client = OllamaChatClient()
-        try:
-            messages = create_direct_answer_prompt(query)
-            response = llm_client.generate_response(messages)
-        except Exception as e:
-            return {
-                "response": f"I encountered an error while generating a response: {str(e)}",
-                "query_type": query_type.value,
-                "retrieved_docs": [],
-                "context": "",
-                "metadata": {
-                    **metadata,
-                    "error": str(e)
-                }
-            }
-        
-        return {
-            "response": response,
-            "query_type": query_type.value,
-            "retrieved_docs": [],
-            "context": "",
-            "metadata": metadata
-        }
+        messages = create_direct_answer_prompt(query)
+    
+    # Step 3: Generate response (with context on the RAG path)
+    try:
+        response = get_llm_client().generate_response(messages)
+    except Exception as e:
+        response = f"I encountered an error while generating a response: {str(e)}"
+        metadata = {**metadata, "error": str(e)}
+    else:
+        _cache_response(query_embedding, response)
+        metadata = {**metadata, **context_metadata}
+    
+    return {
+        "response": response,
+        "query_type": query_type.value,
+        "retrieved_docs": retrieved_docs,
+        "context": context,
+        "metadata": metadata
+    }
 
 
 class SimpleRAGPipeline:
@@ -318,6 +343,33 @@ class SimpleRAGPipeline:
             top_k=self.top_k,
             similarity_threshold=self.similarity_threshold
         )
+    
+    async def process_batch(
+        self,
+        queries: List[str],
+        max_concurrency: int = 5,
+    ) -> List[Dict[str, Any]]:
+        """
+        Process several queries concurrently.
+        
+        Each query runs through process_query in a worker thread, so
+        retrieval and generation for different queries overlap. At most
+        max_concurrency queries are in flight at once.
+        
+        Args:
+            queries: The user query strings
+            max_concurrency: Maximum number of queries processed at once
+            
+        Returns:
+            List of result dictionaries, in the same order as queries
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def process_one(query: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await asyncio.to_thread(self.process, query)
+        
+        return await asyncio.gather(*(process_one(query) for query in queries))
 
 
 def chat(query: str) -> str:
@@ -99,8 +99,7 @@ def example_queries():
     print("  📋 Running Example Queries")
     print("=" * 70)
     
-    for query in examples:
-        query_type, confidence, metadata = classifier.classify_query(query)
+    for query, (query_type, confidence, metadata) in zip(examples, classifier.classify_batch(examples)):
         print_classification(query, query_type, confidence, metadata)
 
 
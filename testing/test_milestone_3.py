@@ -244,6 +244,55 @@ def test_result_format():
         return False
 
 
+def test_cosine_distance_range():
+    """Test that the collection uses cosine distance, so score = 1 - distance holds."""
+    print("📐 Testing Cosine Distance Range...")
+    
+    try:
+        import tempfile
+        from db.chromadb_service import ChromaDBService
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_service = ChromaDBService(
+                collection_name="cosine_range_check",
+                persist_directory=tmp_dir
+            )
+            
+            space = db_service.collection.metadata.get("hnsw:space")
+            if space != "cosine":
+                print(f"   ❌ Collection distance space should be 'cosine', got {space}\n")
+                return False
+            print("   ✅ Collection uses cosine distance")
+            
+            # Same, orthogonal and opposite directions: distances 0, 1 and 2
+            db_service.create(
+                texts=["same", "orthogonal", "opposite"],
+                embeddings=[[1.0, 0.0], [0.0, 1.0], [-1.0, 0.0]],
+                ids=["same", "orthogonal", "opposite"],
+                metadatas=[{"direction": "same"}, {"direction": "orthogonal"}, {"direction": "opposite"}]
+            )
+            results = db_service.read(query_embeddings=[[2.0, 0.0]], n_results=3)
+            distances = results["distances"][0]
+            print(f"   → Distances: {[round(d, 3) for d in distances]}")
+            
+            if not all(-1e-6 <= d <= 2.0 + 1e-6 for d in distances):
+                print("   ❌ Cosine distances must be within [0, 2]\n")
+                return False
+            
+            if abs(distances[0]) > 1e-6:
+                print(f"   ❌ Identical direction should have distance 0, got {distances[0]}\n")
+                return False
+        
+        print("   ✅ Distances are within [0, 2]; similarity = 1 - distance is valid!\n")
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}\n")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def test_similarity_threshold():
     """Test that similarity threshold filtering works."""
     print("🎯 Testing Similarity Threshold...")
@@ -410,6 +459,78 @@ def test_convenience_function():
         return False
 
 
+def test_multi_query_fusion():
+    """Test that retrieve_for_queries fuses per-query rankings with RRF."""
+    print("🔀 Testing Multi-Query Fusion...")
+    
+    try:
+        import threading
+        from collections import OrderedDict
+        from langgraph_service.rag.retriever import ChromaDBRetriever
+        
+        class StubEmbedder:
+            def __init__(self):
+                self.calls = []
+            
+            def embed_many(self, texts):
+                self.calls.append(list(texts))
+                return [[0.0, 1.0] for _ in texts]
+        
+        class FakeCollection:
+            def __init__(self):
+                self.query_count = None
+            
+            def read(self, query_embeddings, n_results):
+                self.query_count = len(query_embeddings)
+                # Query 0 ranks a > b > c; query 1 ranks b > c > d
+                return {
+                    "ids": [["a", "b", "c"], ["b", "c", "d"]],
+                    "documents": [["A", "B", "C"], ["B", "C", "D"]],
+                    "distances": [[0.1, 0.2, 0.3], [0.05, 0.25, 0.4]],
+                    "metadatas": [[None] * 3, [None] * 3],
+                }
+        
+        # Build the retriever without connecting to ChromaDB or Ollama
+        retriever = ChromaDBRetriever.__new__(ChromaDBRetriever)
+        retriever.embedding_model = "stub"
+        retriever.embedder = StubEmbedder()
+        retriever.embedding_cache_size = 0
+        retriever._embedding_cache = OrderedDict()
+        retriever._embedding_cache_lock = threading.Lock()
+        retriever.chromadb_service = FakeCollection()
+        retriever._distance_scale = 1.0
+        
+        # The repeated and blank phrasings are dropped before searching
+        docs = retriever.retrieve_for_queries(
+            ["limit", "limit", "  ", "daily limit"],
+            top_k=3,
+            similarity_threshold=0.0,
+            query_embedding=[1.0, 0.0]
+        )
+        fused = [(doc["id"], round(doc["score"], 2)) for doc in docs]
+        print(f"   → Fused (id, best score) → {fused}")
+        print(f"   → Queries searched: {retriever.chromadb_service.query_count}, "
+              f"embedded: {retriever.embedder.calls}")
+        
+        # b and c rank for both queries; each keeps its best score
+        if (
+            fused == [("b", 0.95), ("c", 0.75), ("a", 0.9)]
+            and retriever.chromadb_service.query_count == 2
+            and retriever.embedder.calls == [["daily limit"]]
+        ):
+            print("   ✅ Multi-query fusion works correctly!\n")
+            return True
+        else:
+            print("   ❌ Multi-query fusion returned unexpected results\n")
+            return False
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}\n")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def main():
     """Run all tests for Milestone 3."""
     print("=" * 70)
@@ -437,18 +558,24 @@ def main():
     # Test 6: Result format
     results.append(("Result Format", test_result_format()))
     
-    # Test 7: Similarity threshold
+    # Test 7: Cosine distance range
+    results.append(("Cosine Distance Range", test_cosine_distance_range()))
+    
+    # Test 8: Similarity threshold
     results.append(("Similarity Threshold", test_similarity_threshold()))
     
-    # Test 8: Top-K parameter
+    # Test 9: Top-K parameter
     results.append(("Top-K Parameter", test_top_k()))
     
-    # Test 9: Empty query handling
+    # Test 10: Empty query handling
     results.append(("Empty Query Handling", test_empty_query()))
     
-    # Test 10: Convenience function
+    # Test 11: Convenience function
     results.append(("Convenience Function", test_convenience_function()))
     
+    # Test 12: Multi-query fusion
+    results.append(("Multi-Query Fusion", test_multi_query_fusion()))
+    
     # Print summary
     print("=" * 70)
     print("  📋 Test Summary")
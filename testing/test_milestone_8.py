@@ -356,6 +356,326 @@ def test_graph_streaming():
         return False
 
 
+def test_semantic_cache():
+    """Test the semantic response cache and cache routing."""
+    print("🧠 Testing Semantic Cache...")
+    
+    try:
+        import time
+        from langgraph_service.cache import SemanticCache, SQLiteCacheStore
+        from langgraph_service.graph.graph import route_after_cache
+        from langgraph_service.graph.state import create_initial_state
+        
+        cache = SemanticCache(max_size=2, threshold=0.9, ttl=0)
+        cache.put([1.0, 0.0, 0.0], "answer A")
+        
+        # Near-duplicate (cosine ~0.995) hits, orthogonal query misses
+        hit = cache.lookup([1.0, 0.1, 0.0])
+        miss = cache.lookup([0.0, 1.0, 0.0])
+        print(f"   → Similar query → {hit!r}")
+        print(f"   → Unrelated query → {miss!r}")
+        
+        # LRU eviction: A was just used, so B is replaced by C
+        cache.put([0.0, 1.0, 0.0], "answer B")
+        cache.lookup([1.0, 0.0, 0.0])
+        cache.put([0.0, 0.0, 1.0], "answer C")
+        evicted = cache.lookup([0.0, 1.0, 0.0])
+        kept = cache.lookup([1.0, 0.0, 0.0])
+        print(f"   → After eviction: B → {evicted!r}, A → {kept!r}")
+        
+        # TTL: expired entries are not served
+        ttl_cache = SemanticCache(max_size=2, threshold=0.9, ttl=0.05)
+        ttl_cache.put([1.0, 0.0], "stale")
+        time.sleep(0.1)
+        expired = ttl_cache.lookup([1.0, 0.0])
+        print(f"   → Expired entry → {expired!r}")
+        
+        # Quantized matrices still find the near-duplicate; unknown types are rejected
+        quantized = []
+        for quantize in ("float16", "int8"):
+            quantized_cache = SemanticCache(max_size=2, threshold=0.9, ttl=0, quantize=quantize)
+            quantized_cache.put([1.0, 0.0, 0.0], "answer A")
+            quantized.append(quantized_cache.lookup([1.0, 0.1, 0.0]))
+        try:
+            SemanticCache(quantize="fp16")
+            rejected = False
+        except ValueError:
+            rejected = True
+        print(f"   → Quantized hits (float16, int8) → {quantized}, unknown type rejected → {rejected}")
+        
+        # Persistence: a new cache on the same store serves the old entries
+        store = SQLiteCacheStore(":memory:")
+        SemanticCache(max_size=2, threshold=0.9, ttl=0, store=store).put([1.0, 0.0], "persisted")
+        restored = SemanticCache(max_size=2, threshold=0.9, ttl=0, store=store).lookup([1.0, 0.0])
+        print(f"   → Restored entry → {restored!r}")
+        
+        # Caches sharing a store (e.g. several server processes) keep each other's entries
+        shared_store = SQLiteCacheStore(":memory:")
+        first_cache = SemanticCache(max_size=2, threshold=0.9, ttl=0, store=shared_store)
+        second_cache = SemanticCache(max_size=2, threshold=0.9, ttl=0, store=shared_store)
+        first_cache.put([1.0, 0.0], "first")
+        second_cache.put([0.0, 1.0], "second")
+        shared = sorted(shared_store.read()["documents"])
+        print(f"   → Shared store entries → {shared}")
+        
+        # Entries are only served in the conversation context they were cached in
+        from langgraph_service.graph import nodes
+        from langgraph_service.service.rag_service import RAGService
+        
+        class StubRetriever:
+            def embed_query(self, query):
+                return [1.0, 0.0]
+            
+            def retrieve_relevant_docs(self, **kwargs):
+                return [{"text": "The daily limit is $10,000.", "score": 0.8}]
+            
+            retrieve_for_queries = retrieve_relevant_docs
+        
+        class StubLLMClient:
+            def __init__(self):
+                self.calls = 0
+            
+            def generate_response(self, messages):
+                self.calls += 1
+                return f"generated answer {self.calls}"
+            
+            def stream_response(self, messages):
+                yield self.generate_response(messages)
+        
+        node_cache = SemanticCache(max_size=4, threshold=0.9, ttl=0)
+        node_cache.put([1.0, 0.0], "cached answer")
+        llm_client = StubLLMClient()
+        original_getters = (nodes.get_retriever, nodes.get_semantic_cache, nodes.get_llm_client)
+        nodes.get_retriever = StubRetriever
+        nodes.get_semantic_cache = lambda: node_cache
+        nodes.get_llm_client = lambda: llm_client
+        try:
+            fresh_state = create_initial_state("What is my daily limit?")
+            follow_up_state = create_initial_state("And for business accounts?")
+            follow_up_state["messages"] = [
+                {"role": "user", "content": "What is my daily limit?"},
+                {"role": "assistant", "content": "It is $10,000."},
+            ]
+            prompted_state = create_initial_state("What is my daily limit?")
+            prompted_state["metadata"]["system_prompt"] = "Answer in French."
+            fresh_hit = nodes.semantic_cache_node(fresh_state).get("response")
+            follow_up_hit = nodes.semantic_cache_node(follow_up_state).get("response")
+            prompted_hit = nodes.semantic_cache_node(prompted_state).get("response")
+            
+            # A follow-up's answer is cached under its own context
+            follow_up_state["query_embedding"] = [1.0, 0.0]
+            nodes._cache_response(follow_up_state, "follow-up answer")
+            follow_up_repeat = nodes.semantic_cache_node(follow_up_state).get("response")
+            
+            # Served through RAGService: a new conversation hits the first one's
+            # answer, a follow-up in that conversation does not
+            node_cache.clear()
+            service = RAGService(warmup=False)
+            first_turn = service.chat("What is my daily limit?")
+            follow_up_turn = service.chat("And for business accounts?")
+            new_conversation_turn = service.chat("What's my daily limit?", reset_history=True)
+            stateless = RAGService(enable_history=False, warmup=False)
+            stateless_turn = stateless.chat("what is the daily limit")
+        finally:
+            nodes.get_retriever, nodes.get_semantic_cache, nodes.get_llm_client = original_getters
+        print(f"   → Hits (fresh, with history, with system prompt) → "
+              f"{(fresh_hit, follow_up_hit, prompted_hit)!r}")
+        print(f"   → Follow-up repeated in its context → {follow_up_repeat!r}")
+        service_turns = (first_turn, follow_up_turn, new_conversation_turn, stateless_turn)
+        print(f"   → RAGService turns → {service_turns} ({llm_client.calls} LLM calls)")
+        
+        # Routing: hits go straight to respond, misses fan out
+        hit_state = create_initial_state("Hi")
+        hit_state["metadata"] = {"semantic_cache_hit": True}
+        routes = (route_after_cache(hit_state), route_after_cache(create_initial_state("Hi")))
+        print(f"   → Routes (hit, miss) → {routes}")
+        
+        stats = cache.stats()
+        print(f"   → Stats: {stats}")
+        
+        if (
+            hit == "answer A"
+            and miss is None
+            and evicted is None
+            and kept == "answer A"
+            and expired is None
+            and quantized == ["answer A", "answer A"]
+            and rejected
+            and restored == "persisted"
+            and shared == ["first", "second"]
+            and (fresh_hit, follow_up_hit, prompted_hit) == ("cached answer", None, None)
+            and follow_up_repeat == "follow-up answer"
+            and service_turns == (
+                "generated answer 1",
+                "generated answer 2",
+                "generated answer 1",
+                "generated answer 1",
+            )
+            and llm_client.calls == 2
+            and routes == ("respond", ["classify", "retrieve"])
+            and stats["hits"] == 3
+        ):
+            print("   ✅ Semantic cache works correctly!\n")
+            return True
+        else:
+            print("   ❌ Semantic cache returned unexpected results\n")
+            return False
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}\n")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_context_compression():
+    """Test query-relevant compression of documents that exceed the context budget."""
+    print("🗜️  Testing Context Compression...")
+    
+    try:
+        from langgraph_service.rag.compressor import compress
+        from langgraph_service.graph.nodes import format_context
+        
+        text = (
+            "Welcome to our bank. We value every customer. "
+            "The daily transaction limit is $10,000 for standard accounts. "
+            "Contact support for more help."
+        )
+        query = "What is my daily transaction limit?"
+        
+        # Only the relevant sentence is kept; short texts are left alone
+        compressed = compress(text, query, 80)
+        unchanged = compress("Short text.", query, 80)
+        print(f"   → Compressed → {compressed!r}")
+        
+        # format_context uses compression only for documents that do not fit
+        context = format_context([{"text": text, "score": 0.9}], max_length=130, query=query)
+        print(f"   → Context → {context!r}")
+        
+        if (
+            compressed == "The daily transaction limit is $10,000 for standard accounts."
+            and unchanged == "Short text."
+            and context.endswith(compressed)
+        ):
+            print("   ✅ Context compression works correctly!\n")
+            return True
+        else:
+            print("   ❌ Context compression returned unexpected results\n")
+            return False
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}\n")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_speculative_execution():
+    """Test speculative routing and the race between the RAG and direct answers."""
+    print("🏁 Testing Speculative Execution...")
+    
+    try:
+        import threading
+        import time
+        from langgraph_service.graph import graph as graph_module
+        from langgraph_service.graph import nodes
+        from langgraph_service.graph.state import create_initial_state
+        
+        # Routing: only low-confidence rag/direct queries take the speculative path
+        def route(query_type, confidence):
+            state = create_initial_state("How do I block my card?")
+            state["metadata"] = {"query_type": query_type, "classification_confidence": confidence}
+            return graph_module.route_after_classification(state)
+        
+        threshold = graph_module.SPECULATIVE_CONFIDENCE_THRESHOLD
+        original_enabled = graph_module.ENABLE_SPECULATIVE_EXEC
+        graph_module.ENABLE_SPECULATIVE_EXEC = True
+        try:
+            routes = (
+                route("rag_required", threshold - 0.1),
+                route("direct_answer", threshold - 0.1),
+                route("rag_required", threshold),
+                route("unclear", 0.1),
+            )
+        finally:
+            graph_module.ENABLE_SPECULATIVE_EXEC = original_enabled
+        print(f"   → Routes (low rag, low direct, rag at threshold, unclear) → {routes}")
+        
+        class StubLLMClient:
+            """Answers per path; a path can fail or block until released."""
+            def __init__(self, rag=None, direct=None, block_direct=False):
+                self.replies = {"rag": rag, "direct": direct}
+                self.block_direct = block_direct
+                self.release = threading.Event()
+            
+            def generate_response(self, messages):
+                path = "rag" if "Context from knowledge base" in messages[-1]["content"] else "direct"
+                if path == "direct" and self.block_direct:
+                    self.release.wait(5)
+                reply = self.replies[path]
+                if reply is None:
+                    raise ConnectionError(f"{path} failed")
+                return reply
+        
+        def run(client, with_docs=True):
+            state = create_initial_state("How do I block my card?")
+            if with_docs:
+                state["retrieved_docs"] = [{"text": "Block your card in the app.", "score": 0.8}]
+            streamed = []
+            original_getters = (nodes.get_llm_client, nodes._stream_writer)
+            nodes.get_llm_client = lambda: client
+            nodes._stream_writer = lambda: streamed.append
+            try:
+                start = time.perf_counter()
+                update = nodes.speculative_answer_node(state)
+                return update, time.perf_counter() - start, streamed
+            finally:
+                nodes.get_llm_client, nodes._stream_writer = original_getters
+                client.release.set()
+        
+        # The first successful answer wins without waiting for the other
+        fast_rag, elapsed, fast_rag_streamed = run(StubLLMClient(rag="rag answer", direct="direct answer", block_direct=True))
+        # A failed candidate falls back to the other one
+        fallback, _, _ = run(StubLLMClient(rag=None, direct="direct answer"))
+        # Without documents only the direct answer runs
+        no_docs, _, _ = run(StubLLMClient(rag="rag answer", direct="direct answer"), with_docs=False)
+        # Both failing reports a generation error
+        both_failed, _, both_failed_streamed = run(StubLLMClient())
+        
+        outcomes = (
+            (fast_rag["response"], fast_rag["metadata"]["speculative_winner"]),
+            (fallback["response"], fallback["metadata"]["speculative_winner"]),
+            (no_docs["response"], no_docs["metadata"]["speculative_winner"]),
+        )
+        print(f"   → Winners → {outcomes} (fast path took {elapsed:.2f}s)")
+        print(f"   → Both failed → {both_failed['metadata']!r}")
+        print(f"   → Streamed (winner, both failed) → {fast_rag_streamed}, {both_failed_streamed}")
+        
+        if (
+            routes == ("speculative_path", "speculative_path", "rag_path", "respond")
+            and outcomes == (
+                ("rag answer", "rag"),
+                ("direct answer", "direct"),
+                ("direct answer", "direct"),
+            )
+            and elapsed < 1.0
+            and fast_rag_streamed == [{"response_delta": "rag answer"}]
+            and both_failed_streamed == []
+            and "generation_error" in both_failed["metadata"]
+        ):
+            print("   ✅ Speculative execution works correctly!\n")
+            return True
+        else:
+            print("   ❌ Speculative execution returned unexpected results\n")
+            return False
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}\n")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def main():
     """Run all tests for Milestone 8."""
     print("=" * 70)
@@ -392,6 +712,15 @@ def main():
     # Test 9: Graph streaming
     results.append(("Graph Streaming", test_graph_streaming()))
     
+    # Test 10: Semantic cache
+    results.append(("Semantic Cache", test_semantic_cache()))
+    
+    # Test 11: Context compression
+    results.append(("Context Compression", test_context_compression()))
+    
+    # Test 12: Speculative execution
+    results.append(("Speculative Execution", test_speculative_execution()))
+    
     # Print summary
     print("=" * 70)
     print("  📋 Test Summary")
@@ -328,6 +328,67 @@ def test_end_to_end():
         return False
 
 
+def test_async_chat():
+    """Test achat() and the API's /chat handler with a stub graph."""
+    print("⚡ Testing Async Chat...")
+    
+    try:
+        import asyncio
+        from langgraph_service.service import RAGService
+        from api import main as api_main
+        
+        class StubGraph:
+            """Answers through the async interface only; can be told to fail."""
+            def __init__(self):
+                self.calls = 0
+                self.fail = False
+            
+            async def ainvoke(self, state):
+                self.calls += 1
+                if self.fail:
+                    raise ConnectionError("Ollama is down")
+                await asyncio.sleep(0)
+                return {"response": f"async answer to {state['query']}", "metadata": {}}
+        
+        graph = StubGraph()
+        service = RAGService(warmup=False, graph=graph)
+        
+        first = asyncio.run(service.achat("What is my daily limit?"))
+        repeated = asyncio.run(service.achat("What is my daily limit?", reset_history=True))
+        print(f"   → achat → {first!r}, then {repeated!r} ({graph.calls} graph runs)")
+        
+        # The API's /chat handler awaits achat and returns its reply
+        original_service = api_main.rag_service
+        api_main.rag_service = service
+        try:
+            request = api_main.ChatRequest(message="How do I block my card?")
+            api_reply = asyncio.run(api_main.chat(request))
+            graph.fail = True
+            api_error = asyncio.run(api_main.chat(api_main.ChatRequest(message="Any news?")))
+        finally:
+            api_main.rag_service = original_service
+        print(f"   → /chat → {api_reply.response!r}")
+        print(f"   → /chat with a failing graph → {api_error.response[:40]!r}...")
+        
+        if (
+            first == repeated == "async answer to What is my daily limit?"
+            and api_reply.response == "async answer to How do I block my card?"
+            and api_error.response.startswith("I encountered an error")
+            and graph.calls == 4
+        ):
+            print("   ✅ Async chat works correctly!\n")
+            return True
+        else:
+            print("   ❌ Async chat returned unexpected results\n")
+            return False
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}\n")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def main():
     """Run all tests for Milestone 9."""
     print("=" * 70)
@@ -358,6 +419,9 @@ def main():
     # Test 7: End-to-end
     results.append(("End-to-End", test_end_to_end()))
     
+    # Test 8: Async chat
+    results.append(("Async Chat", test_async_chat()))
+    
     # Print summary
     print("=" * 70)
     print("  📋 Test Summary")
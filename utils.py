@@ -2,18 +2,44 @@ import requests
 import json
 import uuid
 from typing import List, Dict, Any, Optional
-import numpy as np
 from config import OLLAMA_API_URL, EMBEDDING_MODEL, OLLAMA_TIMEOUT
 
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    # orjson is optional: it only speeds up encoding and decoding API bodies
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+    _loads = json.loads
 
-def text_to_embeddings(texts: List[str], model: str = EMBEDDING_MODEL, api_url: str = OLLAMA_API_URL) -> List[List[float]]:
+# Shared HTTP session so repeated embedding calls reuse pooled keep-alive connections
+_session = requests.Session()
+
+# Request bodies are encoded with _dumps and sent as raw data
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def text_to_embeddings(
+    texts: List[str],
+    model: str = EMBEDDING_MODEL,
+    api_url: str = OLLAMA_API_URL,
+    session: Optional[requests.Session] = None
+) -> List[List[float]]:
     """
     Convert a list of text strings to embeddings using Ollama API.
     
+    All texts are sent in a single request using Ollama's batched
+    /api/embed input, so callers should pass every text they need
+    embedded at once rather than looping.
+    
     Args:
         texts: List of text strings to embed
         model: Embedding model name (default: "all-minilm")
         api_url: Ollama API URL (default: "http://localhost:11434/api/embed")
+        session: Optional HTTP session to send the request with
+                 (default: a module-level session shared by all callers)
     
     Returns:
         List of embedding vectors (list of floats)
@@ -30,16 +56,29 @@ def text_to_embeddings(texts: List[str], model: str = EMBEDDING_MODEL, api_url:
     }
     
     try:
-        response = requests.post(api_url, json=payload, timeout=OLLAMA_TIMEOUT)
+        response = (session or _session).post(
+            api_url,
+            data=_dumps(payload),
+            headers=_JSON_HEADERS,
+            timeout=OLLAMA_TIMEOUT
+        )
         response.raise_for_status()
         
-        result = response.json()
+        result = _loads(response.content)
         embeddings = result.get("embeddings", [])
         
-        return embeddings
-        
     except requests.exceptions.RequestException as e:
         raise ConnectionError(f"Failed to generate embeddings: {e}. Please ensure Ollama is running.")
+    except ValueError as e:
+        raise ConnectionError(f"Unexpected response format from Ollama embeddings API: {e}")
+    
+    if len(embeddings) != len(texts):
+        raise ConnectionError(
+            f"Expected {len(texts)} embeddings from Ollama but received {len(embeddings)}. "
+            "Please ensure the Ollama version supports batched /api/embed input."
+        )
+    
+    return embeddings
 
 
 def json_to_embeddings(
@@ -153,12 +192,10 @@ def get_embedding_info(embeddings: List[List[float]]) -> Dict[str, Any]:
     if not embeddings:
         return {"count": 0, "dimension": 0}
     
-    vector_array = np.array(embeddings[0])
-    dimension = vector_array.shape[0]
-    
+    # Only the first vector is inspected; all embeddings share its dimension
     return {
         "count": len(embeddings),
-        "dimension": dimension,
+        "dimension": len(embeddings[0]),
         "sample_values": embeddings[0][:5] if embeddings else []
     }
 